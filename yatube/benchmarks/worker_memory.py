@@ -0,0 +1,174 @@
+"""
+Memory per worker of a pre-forking server, with and without WSGI_PRELOAD.
+
+Each mode runs in a fresh interpreter that forks --workers processes
+the way gunicorn does. With preload the master imports yatube.wsgi
+before forking; without it every worker imports it after the fork.
+Workers then serve a few feed requests and wait while the master reads
+/proc/<pid>/smaps_rollup of all of them at once.
+
+RSS counts shared pages in full for every worker, so the fleet total
+is the sum of PSS, and USS is what each worker holds privately.
+
+Linux only. Run from the project directory on a migrated, seeded
+database:
+
+    python benchmarks/worker_memory.py --workers 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from io import BytesIO
+from typing import Dict, List
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ('/', '/?page=2', '/about/author/')
+MODES = ('no-preload', 'preload')
+
+
+def read_memory(pid: int) -> Dict[str, int]:
+    """RSS, PSS and USS of a process in kilobytes."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as file:
+        for line in file:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0])
+
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'uss': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def serve(application, requests: int) -> None:
+    from wsgiref.util import setup_testing_defaults
+
+    for _ in range(requests):
+        for path in PATHS:
+            path_info, _, query = path.partition('?')
+            environ = {
+                'PATH_INFO': path_info,
+                'QUERY_STRING': query,
+                'wsgi.input': BytesIO(),
+            }
+            setup_testing_defaults(environ)
+            body = application(environ, lambda *args: None)
+            b''.join(body)
+            body.close()
+
+
+def load_application(preload: bool):
+    from django.conf import settings
+
+    settings.WSGI_PRELOAD = preload
+    settings.WARM_UP_ON_START = True
+    # Keep connection.queries from growing with every request.
+    settings.DEBUG = False
+
+    from yatube.wsgi import application
+
+    return application
+
+
+def run_mode(preload: bool, workers: int, requests: int) -> dict:
+    """Fork workers in this process and measure them, see module doc."""
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+    application = load_application(preload) if preload else None
+    ready_read, ready_write = os.pipe()
+    stop_read, stop_write = os.pipe()
+    pids: List[int] = []
+
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            os.close(stop_write)
+            if application is None:
+                application = load_application(preload)
+            serve(application, requests)
+            os.write(ready_write, b'.')
+            # Stay alive until the master has measured everyone.
+            os.read(stop_read, 1)
+            os._exit(0)
+        pids.append(pid)
+
+    os.close(ready_write)
+    os.close(stop_read)
+    for _ in pids:
+        os.read(ready_read, 1)
+
+    result = {
+        'master': read_memory(os.getpid()),
+        'workers': [read_memory(pid) for pid in pids],
+    }
+
+    os.close(stop_write)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    return result
+
+
+def report(mode: str, result: dict) -> None:
+    workers = result['workers']
+    average = {
+        key: sum(worker[key] for worker in workers) / len(workers) / 1024
+        for key in ('rss', 'pss', 'uss')
+    }
+    total_pss = (
+        sum(worker['pss'] for worker in workers)
+        + result['master']['pss']
+    ) / 1024
+
+    print(
+        f'{mode:>10}  {average["rss"]:>8.1f}  {average["pss"]:>8.1f}  '
+        f'{average["uss"]:>8.1f}  {total_pss:>9.1f}'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument(
+        '--requests',
+        type=int,
+        default=20,
+        help='Rounds of feed requests per worker.',
+    )
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.mode:
+        result = run_mode(
+            options.mode == 'preload', options.workers, options.requests
+        )
+        print(json.dumps(result))
+        return
+
+    print(f'{options.workers} workers, MiB per worker; total is PSS of all')
+    print(f'{"mode":>10}  {"RSS":>8}  {"PSS":>8}  {"USS":>8}  {"total":>9}')
+
+    for mode in MODES:
+        # A fresh interpreter, so nothing is preloaded by the previous mode.
+        output = subprocess.run(
+            [
+                sys.executable, __file__,
+                '--mode', mode,
+                '--workers', str(options.workers),
+                '--requests', str(options.requests),
+            ],
+            cwd=BASE_DIR,
+            check=True,
+            stdout=subprocess.PIPE,
+        ).stdout
+        report(mode, json.loads(output.decode().splitlines()[-1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+from django.contrib import admin
+
+from .models import SlowQuery, StoredFile
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'view', 'duration_ms', 'sql', 'created')
+    list_filter = ('view', 'created')
+    search_fields = ('sql',)
+    readonly_fields = (
+        'created', 'view', 'sql', 'params', 'duration_ms', 'plan',
+    )
+    empty_value_display = '-пусто-'
+
+
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'size', 'refs', 'created')
+    search_fields = ('name',)
+    readonly_fields = ('name', 'size', 'refs', 'created')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(SlowQuery, SlowQueryAdmin)
+admin.site.register(StoredFile, StoredFileAdmin)
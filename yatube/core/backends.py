@@ -0,0 +1,33 @@
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from .metrics import add_template_time
+
+
+class TimedTemplate(Template):
+    """Template that adds its render time to the current request."""
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            add_template_time(time.perf_counter() - start)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    DjangoTemplates backend timing top-level renders.
+
+    Includes and extends are rendered inside the top-level template,
+    so their time is counted once.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(
+            super().get_template(template_name).template, self
+        )
@@ -0,0 +1,56 @@
+import glob
+import io
+import os
+import pstats
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.middleware import profile_header_value
+
+
+class Command(BaseCommand):
+    help = 'Merge stored request profiles into per-view hot-function reports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', help='Only this view, e.g. posts:index.')
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--sort',
+            default='cumulative',
+            choices=('cumulative', 'tottime', 'ncalls'),
+        )
+        parser.add_argument('--path', default=settings.PROFILING_DIR)
+        parser.add_argument(
+            '--header',
+            action='store_true',
+            help='Print an X-Profile header value, valid for '
+                 'PROFILE_TOKEN_MAX_AGE seconds, and exit.',
+        )
+
+    def handle(self, *args, **options):
+        if options['header']:
+            self.stdout.write(f'X-Profile: {profile_header_value()}')
+            return
+
+        by_view = defaultdict(list)
+        for path in glob.glob(os.path.join(options['path'], '*.prof')):
+            view = os.path.basename(path).split('.', 1)[0].replace('-', ':')
+            by_view[view].append(path)
+
+        if options['view']:
+            by_view = {options['view']: by_view.get(options['view'], [])}
+
+        if not any(by_view.values()):
+            raise CommandError(f'No profiles in {options["path"]}')
+
+        for view, paths in sorted(by_view.items()):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{view}: {len(paths)} profiles'
+            ))
+            report = io.StringIO()
+            stats = pstats.Stats(*paths, stream=report)
+            stats.strip_dirs().sort_stats(options['sort'])
+            stats.print_stats(options['top'])
+            self.stdout.write(report.getvalue())
@@ -0,0 +1,41 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into a local replica file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default='replica',
+            help='Replica alias to fill (default: replica).',
+        )
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        primary = connections.databases[DEFAULT_DB_ALIAS]
+
+        if alias not in connections.databases:
+            raise CommandError(f'Unknown database alias: {alias}')
+
+        replica = connections.databases[alias]
+
+        for db in (primary, replica):
+            if not db['ENGINE'].endswith('sqlite3'):
+                raise CommandError('Only SQLite databases can be synced.')
+
+        source = sqlite3.connect(primary['NAME'])
+        target = sqlite3.connect(replica['NAME'])
+
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{primary["NAME"]} -> {replica["NAME"]}')
+        )
@@ -0,0 +1,49 @@
+import json
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_profiling import top
+
+
+class Command(BaseCommand):
+    help = 'Report the slowest template nodes from TEMPLATE_PROFILE_LOG.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--view', help='Only requests of this view.')
+        parser.add_argument('--path', default=settings.TEMPLATE_PROFILE_LOG)
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            raise CommandError(
+                f'No profile at {options["path"]}, '
+                'enable TEMPLATE_PROFILING and make some requests.'
+            )
+
+        totals = defaultdict(lambda: [0, 0.0])
+        requests = 0
+
+        with open(options['path']) as file:
+            for line in file:
+                record = json.loads(line)
+                if options['view'] and record['view'] != options['view']:
+                    continue
+                requests += 1
+                for label, (calls, seconds) in record['stats'].items():
+                    totals[label][0] += calls
+                    totals[label][1] += seconds
+
+        self.stdout.write(
+            f'{requests} requests; time includes nested nodes.'
+        )
+        self.stdout.write(
+            f'{"total ms":>10} {"calls":>8} {"ms/call":>9}  node'
+        )
+        for label, calls, seconds in top(totals, options['top']):
+            self.stdout.write(
+                f'{seconds * 1000:>10.2f} {calls:>8} '
+                f'{seconds * 1000 / calls:>9.3f}  {label}'
+            )
@@ -0,0 +1,143 @@
+import mimetypes
+import os
+import re
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+SENDFILE_HEADERS = ('X-Sendfile', 'X-Accel-Redirect')
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    First and last byte of a single-range Range header.
+
+    None means the header is to be ignored and the whole file sent:
+    it is malformed or asks for several ranges. A range that starts
+    past the end raises RangeNotSatisfiable.
+    """
+    match = RANGE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # bytes=-500 is the last 500 bytes.
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - suffix, 0), size - 1
+
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size:
+        raise RangeNotSatisfiable(header)
+    if last < first:
+        return None
+    return first, last
+
+
+class FileRange:
+    """
+    Part of an open file for FileResponse, read() stops after length.
+
+    It has no fileno(), so WSGI servers do not sendfile() it: some of
+    them would send everything up to the end of the file.
+    """
+
+    def __init__(self, file, start: int, length: int):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def sendfile_response(path: str, name: str) -> HttpResponse:
+    """Empty response telling the front server which file to send."""
+    response = HttpResponse()
+    if settings.MEDIA_SENDFILE == 'X-Accel-Redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT_URL + name
+        )
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def file_response(request, path: str, size: int, last_modified: str):
+    """FileResponse of the whole file or of the requested range."""
+    file = open(path, 'rb')
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if 'HTTP_RANGE' in request.META and if_range in (None, last_modified):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except RangeNotSatisfiable:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(file)
+        response['Content-Length'] = size
+    else:
+        first, last = byte_range
+        length = last - first + 1
+        response = FileResponse(FileRange(file, first, length), status=206)
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_media(request, name: str, cache_control: dict) -> HttpResponse:
+    """
+    Response for the file at name under MEDIA_ROOT, which must exist.
+
+    With MEDIA_SENDFILE the front server reads the file and handles
+    ranges itself; without it the file goes out in a FileResponse,
+    which the WSGI server sends with os.sendfile() when it can.
+    """
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    stat = os.stat(path)
+    last_modified = http_date(stat.st_mtime)
+
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime,
+        stat.st_size,
+    ):
+        response = HttpResponseNotModified()
+    else:
+        if settings.MEDIA_SENDFILE in SENDFILE_HEADERS:
+            response = sendfile_response(path, name)
+        else:
+            response = file_response(
+                request, path, stat.st_size, last_modified
+            )
+        content_type, _ = mimetypes.guess_type(name)
+        response['Content-Type'] = content_type or 'application/octet-stream'
+
+    response['Last-Modified'] = last_modified
+    patch_cache_control(response, **cache_control)
+    return response
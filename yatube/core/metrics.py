@@ -0,0 +1,148 @@
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+
+METRIC_PREFIX: str = 'yatube_'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (
+    1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+)
+# Name -> (help, buckets)
+HISTOGRAMS = {
+    'request_latency_seconds': ('Request latency.', LATENCY_BUCKETS),
+    'db_time_seconds': ('SQL time per request.', LATENCY_BUCKETS),
+    'template_render_seconds': (
+        'Template render time per request.', LATENCY_BUCKETS,
+    ),
+    'response_size_bytes': ('Response body size.', SIZE_BUCKETS),
+}
+
+_state = threading.local()
+
+# Bucket counts, +Inf count and sum of one (metric, view) histogram
+Row = List[float]
+
+
+def reset_template_time() -> None:
+    _state.template_time = 0.0
+
+
+def add_template_time(seconds: float) -> None:
+    _state.template_time = get_template_time() + seconds
+
+
+def get_template_time() -> float:
+    """Template render time of the current request so far."""
+    return getattr(_state, 'template_time', 0.0)
+
+
+class Registry:
+    """
+    Per-process fixed-bucket histograms keyed by metric and view name.
+
+    Observing is a bisect and two additions under a short lock. Every
+    METRICS_FLUSH_SECONDS the process dumps its totals to METRICS_DIR,
+    where the /metrics view sums the dumps of all worker processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[Tuple[str, str], Row] = {}
+        self._pid = os.getpid()
+        self._flushed_at = time.monotonic()
+
+    def observe(self, metric: str, view: str, value: float) -> None:
+        buckets = HISTOGRAMS[metric][1]
+        index = bisect_left(buckets, value)
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: parent totals belong to the parent.
+                self._rows = {}
+                self._pid = os.getpid()
+
+            row = self._rows.get((metric, view))
+            if row is None:
+                row = self._rows[(metric, view)] = [0] * (len(buckets) + 2)
+            row[index] += 1
+            row[-1] += value
+
+    def maybe_flush(self) -> None:
+        elapsed = time.monotonic() - self._flushed_at
+        if elapsed >= settings.METRICS_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self) -> None:
+        """Dump totals of this process to its file in METRICS_DIR."""
+        with self._lock:
+            data = [
+                [metric, view, row]
+                for (metric, view), row in self._rows.items()
+            ]
+            self._flushed_at = time.monotonic()
+
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+
+    def collect(self) -> Dict[Tuple[str, str], Row]:
+        """Sum totals of all processes."""
+        self.flush()
+        totals: Dict[Tuple[str, str], Row] = {}
+
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            try:
+                with open(path) as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue
+
+            for metric, view, row in data:
+                if metric not in HISTOGRAMS:
+                    continue
+                total = totals.setdefault((metric, view), [0] * len(row))
+                for i, value in enumerate(row):
+                    total[i] += value
+
+        return totals
+
+
+registry = Registry()
+
+
+def render_prometheus(totals: Dict[Tuple[str, str], Row]) -> str:
+    """Render histograms in Prometheus text exposition format."""
+    lines: List[str] = []
+
+    for metric, (help_text, buckets) in HISTOGRAMS.items():
+        name = f'{METRIC_PREFIX}{metric}'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+
+        for (row_metric, view), row in sorted(totals.items()):
+            if row_metric != metric:
+                continue
+
+            labels = f'view="{view}"'
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), row[:-1]):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{name}_sum{{{labels}}} {row[-1]}')
+            lines.append(f'{name}_count{{{labels}}} {cumulative}')
+
+    return '\n'.join(lines) + '\n'
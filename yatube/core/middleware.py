@@ -0,0 +1,320 @@
+import cProfile
+import glob
+import json
+import logging
+import os
+import random
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, transaction
+
+from . import template_profiling
+from .metrics import get_template_time, registry, reset_template_time
+from .models import SlowQuery
+from .queries import QueryCounter, SlowQueryRecorder, explain_query
+from .routers import choose_replica, set_replica_alias
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('core.slow_queries')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+REPLICA_PIN_COOKIE: str = 'primary_pin'
+QUERY_COUNT_HEADER: str = 'X-Query-Count'
+QUERY_TIME_HEADER: str = 'X-Query-Time'
+TEMPLATE_PROFILE_HEADER: str = 'X-Template-Profile'
+TEMPLATE_PROFILE_HEADER_TOP: int = 5
+PROFILE_REQUEST_HEADER: str = 'HTTP_X_PROFILE'
+PROFILE_SALT: str = 'core.profiling'
+PROFILE_TOKEN: str = 'profile'
+
+
+class QueryBudgetExceeded(Exception):
+    """Request ran more queries than QUERY_BUDGET allows."""
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve feed reads from replicas.
+
+    Any write pins the client to the primary for REPLICA_PIN_SECONDS,
+    so the author sees own posts and comments despite replication lag.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            set_replica_alias(None)
+
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+            )
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method in SAFE_METHODS
+                and request.resolver_match.view_name
+                in settings.REPLICA_READ_VIEWS
+                and REPLICA_PIN_COOKIE not in request.COOKIES):
+            set_replica_alias(choose_replica())
+
+
+class QueryBudgetMiddleware:
+    """
+    Record query count and SQL time of every request.
+
+    Requests above QUERY_BUDGET are logged; with DEBUG and
+    QUERY_BUDGET_RAISE they fail, so N+1 regressions show up at once.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+
+        request.query_count = counter.count
+        request.query_time = counter.duration
+
+        if settings.DEBUG:
+            response[QUERY_COUNT_HEADER] = str(counter.count)
+            response[QUERY_TIME_HEADER] = f'{counter.duration * 1000:.2f}ms'
+
+        if counter.count > settings.QUERY_BUDGET:
+            message = (
+                f'{request.method} {request.path}: {counter.count} queries '
+                f'({counter.duration * 1000:.2f}ms), '
+                f'budget is {settings.QUERY_BUDGET}'
+            )
+            if settings.DEBUG and settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Feed per-view histograms of latency, SQL time, template render time
+    and response size.
+
+    Must wrap QueryBudgetMiddleware, which measures the SQL time.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset_template_time()
+        start = time.perf_counter()
+        response = self.get_response(request)
+        latency = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+
+        registry.observe('request_latency_seconds', view, latency)
+        registry.observe(
+            'db_time_seconds', view, getattr(request, 'query_time', 0.0)
+        )
+        registry.observe(
+            'template_render_seconds', view, get_template_time()
+        )
+        if not response.streaming:
+            registry.observe(
+                'response_size_bytes', view, len(response.content)
+            )
+        registry.maybe_flush()
+
+        return response
+
+
+class TemplateProfilingMiddleware:
+    """
+    Time every template node with TEMPLATE_PROFILING on.
+
+    The slowest nodes of a request go to the log and, with DEBUG, to the
+    X-Template-Profile header; all timings are appended to
+    TEMPLATE_PROFILE_LOG for the template_profile report command.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TEMPLATE_PROFILING:
+            raise MiddlewareNotUsed
+        template_profiling.install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        template_profiling.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stats = template_profiling.stop()
+
+        if not stats:
+            return response
+
+        slowest = template_profiling.top(stats, TEMPLATE_PROFILE_HEADER_TOP)
+        summary = '; '.join(
+            f'{label} {seconds * 1000:.2f}ms/{calls}'
+            for label, calls, seconds in slowest
+        )
+        logger.info('Template profile %s: %s', request.path, summary)
+
+        if settings.DEBUG:
+            response[TEMPLATE_PROFILE_HEADER] = summary
+
+        match = request.resolver_match
+        os.makedirs(
+            os.path.dirname(settings.TEMPLATE_PROFILE_LOG), exist_ok=True
+        )
+        with open(settings.TEMPLATE_PROFILE_LOG, 'a') as file:
+            file.write(json.dumps({
+                'view': match.view_name if match else 'unresolved',
+                'stats': stats,
+            }, ensure_ascii=False) + '\n')
+
+        return response
+
+
+def profile_header_value() -> str:
+    """
+    X-Profile header value that forces profiling of a request.
+
+    It is timestamped and accepted for PROFILE_TOKEN_MAX_AGE seconds.
+    """
+    return signing.TimestampSigner(salt=PROFILE_SALT).sign(PROFILE_TOKEN)
+
+
+class ProfilingMiddleware:
+    """
+    Run cProfile on a PROFILING_SAMPLE_RATE share of requests and on
+    requests with a signed, unexpired X-Profile header.
+
+    Profiles are named <view>.<ms>ms.<timestamp>.<pid>.prof; only the
+    newest PROFILING_MAX_FILES are kept in PROFILING_DIR.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        self.save(profiler, view, duration)
+
+        return response
+
+    def should_profile(self, request) -> bool:
+        header = request.META.get(PROFILE_REQUEST_HEADER)
+        if header is not None:
+            try:
+                signer = signing.TimestampSigner(salt=PROFILE_SALT)
+                token = signer.unsign(
+                    header, max_age=settings.PROFILE_TOKEN_MAX_AGE
+                )
+                return token == PROFILE_TOKEN
+            except signing.BadSignature:
+                return False
+
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def save(self, profiler, view: str, duration: float) -> None:
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        name = (
+            f'{view.replace(":", "-")}.{duration * 1000:.0f}ms.'
+            f'{time.time():.6f}.{os.getpid()}.prof'
+        )
+        profiler.dump_stats(os.path.join(settings.PROFILING_DIR, name))
+
+        paths = sorted(
+            glob.glob(os.path.join(settings.PROFILING_DIR, '*.prof')),
+            key=os.path.getmtime,
+        )
+        for path in paths[:-settings.PROFILING_MAX_FILES]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class SlowQueryMiddleware:
+    """
+    Log queries slower than SLOW_QUERY_MS with their plan.
+
+    Each one goes to the core.slow_queries logger as JSON and to the
+    SlowQuery admin. Plans are taken after the response is ready, so
+    they do not add to the measured request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with SlowQueryRecorder(settings.SLOW_QUERY_MS) as recorder:
+            response = self.get_response(request)
+
+        if not recorder.queries:
+            return response
+
+        match = request.resolver_match
+        view = match.view_name if match else request.path
+
+        for connection, sql, params, duration in recorder.queries:
+            self.record(view, connection, sql, params, duration)
+
+        return response
+
+    def record(self, view: str, connection, sql: str, params,
+               duration: float) -> None:
+        """
+        Log and save one slow query, best effort.
+
+        The page is ready by now: a plan or a row that cannot be had is
+        logged and skipped. Savepoints keep the failure from breaking a
+        transaction the request may still be in.
+        """
+        try:
+            with transaction.atomic(using=connection.alias):
+                plan = explain_query(connection, sql, params)
+        except DatabaseError:
+            logger.exception('No plan for a slow query of %s', view)
+            plan = ''
+
+        record = {
+            'view': view,
+            'sql': sql,
+            'params': json.dumps(params, default=str, ensure_ascii=False),
+            'duration_ms': round(duration * 1000, 3),
+            'plan': plan,
+        }
+        slow_query_logger.warning(json.dumps(record, ensure_ascii=False))
+        try:
+            with transaction.atomic():
+                SlowQuery.objects.create(**record)
+        except DatabaseError:
+            logger.exception('Slow query of %s is not saved', view)
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('view', models.CharField(db_index=True, max_length=200, verbose_name='View')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('params', models.TextField(verbose_name='Параметры')),
+                ('duration_ms', models.FloatField(verbose_name='Длительность, мс')),
+                ('plan', models.TextField(blank=True, verbose_name='План запроса')),
+            ],
+            options={
+                'verbose_name': 'Медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Путь')),
+                ('size', models.PositiveIntegerField(verbose_name='Размер, байт')),
+                ('refs', models.PositiveIntegerField(default=1, verbose_name='Ссылки')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+            ],
+            options={
+                'verbose_name': 'Файл',
+                'verbose_name_plural': 'Файлы',
+            },
+        ),
+    ]
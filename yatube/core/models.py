@@ -0,0 +1,36 @@
+from django.db import models
+
+SQL_TEXT_LIMIT: int = 50
+
+
+class SlowQuery(models.Model):
+    """Query slower than SLOW_QUERY_MS with its plan."""
+    created = models.DateTimeField('Дата', auto_now_add=True)
+    view = models.CharField('View', max_length=200, db_index=True)
+    sql = models.TextField('SQL')
+    params = models.TextField('Параметры')
+    duration_ms = models.FloatField('Длительность, мс')
+    plan = models.TextField('План запроса', blank=True)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+
+    def __str__(self):
+        return self.sql[:SQL_TEXT_LIMIT]
+
+
+class StoredFile(models.Model):
+    """File of HashedFileSystemStorage and how many fields refer to it."""
+    name = models.CharField('Путь', max_length=255, unique=True)
+    size = models.PositiveIntegerField('Размер, байт')
+    refs = models.PositiveIntegerField('Ссылки', default=1)
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return self.name
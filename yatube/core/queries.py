@@ -0,0 +1,78 @@
+import time
+from contextlib import ExitStack
+from typing import List
+
+from django.db import connections
+
+
+class ExecuteWrapper:
+    """Base for execute wrappers installed on all database connections."""
+
+    _stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        raise NotImplementedError
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+
+
+class QueryCounter(ExecuteWrapper):
+    """
+    Count queries and total SQL time on all database connections.
+
+    Works without DEBUG, through connection execute wrappers.
+    """
+
+    def __init__(self):
+        self.count: int = 0
+        self.duration: float = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class SlowQueryRecorder(ExecuteWrapper):
+    """Collect (connection, sql, params, seconds) of slow queries."""
+
+    def __init__(self, threshold_ms: float):
+        self.threshold: float = threshold_ms / 1000
+        self.queries: List[tuple] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold and not many:
+                self.queries.append(
+                    (context['connection'], sql, params, duration)
+                )
+
+
+def explain_query(connection, sql: str, params) -> str:
+    """Query plan of a SELECT, one line per plan step."""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+
+    prefix = 'EXPLAIN'
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN'
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}', params)
+        # SQLite puts the step text in the last column, others have one.
+        return '\n'.join(str(row[-1]) for row in cursor.fetchall())
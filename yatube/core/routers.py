@@ -0,0 +1,72 @@
+import os
+import random
+import threading
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Session rows must be visible right after login and job rows right
+# after a worker updates them, so they never lag.
+PRIMARY_ONLY_APPS = ('sessions', 'jobs')
+
+_state = threading.local()
+
+
+def set_replica_alias(alias: Optional[str]) -> None:
+    """Route reads of the current thread to the alias (None - primary)."""
+    _state.alias = alias
+
+
+def get_replica_alias() -> Optional[str]:
+    """Replica alias chosen for the current thread, if any."""
+    return getattr(_state, 'alias', None)
+
+
+def is_replica_available(alias: str) -> bool:
+    """Check that the alias is a separate, existing copy of the primary."""
+    replica = connections.databases[alias]
+    primary = connections.databases[DEFAULT_DB_ALIAS]
+
+    if replica['NAME'] == primary['NAME']:
+        # Test mirrors point at the primary itself.
+        return False
+
+    if replica['ENGINE'].endswith('sqlite3'):
+        return os.path.exists(replica['NAME'])
+
+    return True
+
+
+def choose_replica() -> Optional[str]:
+    """Pick a random available replica alias."""
+    replicas: List[str] = [
+        alias for alias in settings.DATABASE_REPLICAS
+        if is_replica_available(alias)
+    ]
+
+    if not replicas:
+        return None
+
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    """
+    Send reads of whitelisted views to replicas, everything else to primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+
+        return get_replica_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
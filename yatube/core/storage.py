@@ -0,0 +1,151 @@
+import hashlib
+import os
+import re
+import tempfile
+from typing import Tuple
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+# Directory levels of two hex characters each: 65536 leaf directories
+SHARD_LEVELS: int = 2
+HASHED_NAME = re.compile(
+    r'(^|/)' + r'[0-9a-f]{2}/' * SHARD_LEVELS + r'[0-9a-f]{64}(\.\w+)?$'
+)
+
+
+@deconstructible
+class HashedFileSystemStorage(FileSystemStorage):
+    """
+    Store files under the SHA-256 of their content.
+
+    posts/cat.jpg is saved as posts/ab/cd/abcd...ef.jpg: the hash is
+    computed while the upload is streamed to a temporary file, identical
+    content maps to the one existing file, and the shards keep every
+    directory small. StoredFile rows count references, delete() only
+    removes the file with the last one.
+    """
+
+    @staticmethod
+    def is_hashed(name: str) -> bool:
+        """The name is already in the content-addressed layout."""
+        return bool(HASHED_NAME.search(name))
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is the content hash, chosen in _save.
+        return name
+
+    def hashed_name(self, name: str, digest: str) -> str:
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        shards = [
+            digest[level * 2:level * 2 + 2] for level in range(SHARD_LEVELS)
+        ]
+        return os.path.join(directory, *shards, f'{digest}{extension}')
+
+    def spool(self, content) -> Tuple[str, str]:
+        """Copy content to a temporary file, return its path and SHA-256."""
+        os.makedirs(self.location, exist_ok=True)
+        digest = hashlib.sha256()
+        descriptor, tmp_path = tempfile.mkstemp(
+            dir=self.location, prefix='.upload-'
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    file.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest()
+
+    def place(self, tmp_path: str, name: str) -> None:
+        """Move a spooled file to name, or drop it if name is there."""
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            os.remove(tmp_path)
+            return
+
+        os.makedirs(
+            os.path.dirname(full_path),
+            mode=self.directory_permissions_mode or 0o777,
+            exist_ok=True,
+        )
+        os.replace(tmp_path, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+
+    def reference(self, name: str, size: int) -> None:
+        """
+        Count one more reference to name, locking its StoredFile row.
+
+        Call it in a transaction and make sure the file exists before
+        that ends: delete() removes the file under the same lock.
+        """
+        from .models import StoredFile
+
+        stored, created = StoredFile.objects.select_for_update().get_or_create(
+            name=name, defaults={'size': size}
+        )
+        if not created:
+            StoredFile.objects.filter(pk=stored.pk).update(refs=F('refs') + 1)
+
+    def stage(self, name: str, content) -> str:
+        """
+        Put content in place without a reference, return its final name.
+
+        For bulk imports: files are copied in parallel, the references
+        are taken with reference() in the transaction that stores the
+        rows. Until then a delete() of the last reference to the same
+        content may remove the file again.
+        """
+        tmp_path, digest = self.spool(content)
+        name = self.hashed_name(name, digest)
+        try:
+            self.place(tmp_path, name)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return name.replace('\\', '/')
+
+    def _save(self, name, content):
+        tmp_path, digest = self.spool(content)
+        name = self.hashed_name(name, digest)
+        try:
+            with transaction.atomic():
+                self.reference(name, os.path.getsize(tmp_path))
+                # Also restores a file a concurrent delete() removed
+                # before this reference was taken.
+                self.place(tmp_path, name)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return name.replace('\\', '/')
+
+    def delete(self, name):
+        """Drop one reference, remove the file with the last one."""
+        from .models import StoredFile
+
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(
+                name=name
+            ).first()
+            if stored is None:
+                # Saved before hashing, references unknown: keep the file.
+                return
+            if stored.refs > 1:
+                StoredFile.objects.filter(pk=stored.pk).update(
+                    refs=F('refs') - 1
+                )
+                return
+
+            stored.delete()
+            # Still under the row lock, so a save of the same content
+            # waits and then puts the file back.
+            super().delete(name)
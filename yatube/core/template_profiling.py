@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from django.template.base import Node, TextNode, TokenType
+
+LABEL_LIMIT: int = 80
+
+_state = threading.local()
+_original_render_annotated = Node.render_annotated
+
+# Label -> [calls, cumulative seconds]
+Stats = Dict[str, List[float]]
+
+
+def node_label(node: Node) -> str:
+    """Template name and source of the tag or variable, e.g. {% url ... %}."""
+    token = getattr(node, 'token', None)
+    origin = getattr(node, 'origin', None)
+    template_name = getattr(origin, 'template_name', None) or '<string>'
+
+    if token is None:
+        source = type(node).__name__
+    elif token.token_type == TokenType.VAR:
+        source = f'{{{{ {token.contents} }}}}'
+    else:
+        source = f'{{% {token.contents} %}}'
+
+    return f'{template_name}: {source}'[:LABEL_LIMIT]
+
+
+def profiled_render_annotated(self, context):
+    stats = getattr(_state, 'stats', None)
+
+    if stats is None or isinstance(self, TextNode):
+        return _original_render_annotated(self, context)
+
+    start = time.perf_counter()
+    try:
+        return _original_render_annotated(self, context)
+    finally:
+        entry = stats[node_label(self)]
+        entry[0] += 1
+        entry[1] += time.perf_counter() - start
+
+
+def install() -> None:
+    """Wrap rendering of every template node. Idempotent."""
+    Node.render_annotated = profiled_render_annotated
+
+
+def start() -> None:
+    """Start collecting node timings for the current thread."""
+    _state.stats = defaultdict(lambda: [0, 0.0])
+
+
+def stop() -> Optional[Stats]:
+    """Stop collecting and return what was collected."""
+    stats = getattr(_state, 'stats', None)
+    _state.stats = None
+    return stats
+
+
+def top(stats: Stats, limit: int) -> List[tuple]:
+    """The most expensive (label, calls, seconds) entries."""
+    ordered = sorted(
+        stats.items(), key=lambda item: item[1][1], reverse=True
+    )
+    return [
+        (label, calls, seconds)
+        for label, (calls, seconds) in ordered[:limit]
+    ]
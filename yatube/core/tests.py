@@ -1,5 +1,42 @@
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
 from django.core.cache import cache
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.models import KVStore
+
+from posts.models import Post
+from posts.tests.utils import TEST_GIF
+from posts.thumbnails import thumbnail_source
+from posts.warmup import start_warm_up
+
+from . import warmup
+from .media import RangeNotSatisfiable, parse_range
+from .metrics import registry
+from .middleware import (REPLICA_PIN_COOKIE, TEMPLATE_PROFILE_HEADER,
+                         QueryBudgetExceeded, ReplicaRoutingMiddleware,
+                         profile_header_value)
+from .models import SlowQuery, StoredFile
+from .routers import (ReplicaRouter, choose_replica, get_replica_alias,
+                      set_replica_alias)
+from .storage import HashedFileSystemStorage
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -10,3 +47,606 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='HasNoName')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(lambda request: None)
+
+    def tearDown(self) -> None:
+        set_replica_alias(None)
+
+    def process_view(self, request):
+        request.resolver_match = resolve(request.path)
+        self.middleware.process_view(
+            request, request.resolver_match.func, (), {}
+        )
+
+    def test_test_mirror_is_not_used_as_replica(self):
+        """Mirror of the primary is not a separate replica."""
+        self.assertIsNone(choose_replica())
+
+    def test_router_sends_reads_to_chosen_replica(self):
+        """Reads go to the chosen replica, writes and sessions to primary."""
+        set_replica_alias('replica')
+
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_feed_views_use_replica(self):
+        """Whitelisted GET requests are routed to replica."""
+        with mock.patch('core.middleware.choose_replica',
+                        return_value='replica'):
+            self.process_view(self.factory.get(reverse('posts:index')))
+            self.assertEqual(get_replica_alias(), 'replica')
+
+            set_replica_alias(None)
+            self.process_view(self.factory.get(reverse('posts:post_create')))
+            self.assertIsNone(get_replica_alias())
+
+    def test_pinned_client_reads_from_primary(self):
+        """Client with a pin cookie reads from primary."""
+        request = self.factory.get(reverse('posts:index'))
+        request.COOKIES[REPLICA_PIN_COOKIE] = '1'
+
+        with mock.patch('core.middleware.choose_replica',
+                        return_value='replica'):
+            self.process_view(request)
+
+        self.assertIsNone(get_replica_alias())
+
+    def test_write_sets_pin_cookie(self):
+        """Write request pins the client to primary."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), data={}
+        )
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    @override_settings(DEBUG=True, QUERY_BUDGET=0, QUERY_BUDGET_RAISE=True)
+    def test_budget_exceeded_raises_in_debug(self):
+        """Request above the budget fails in debug mode."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('posts:index'))
+
+    @override_settings(QUERY_BUDGET=0, QUERY_BUDGET_RAISE=True)
+    def test_budget_exceeded_is_logged(self):
+        """Request above the budget is logged outside debug mode."""
+        with self.assertLogs('core.middleware', level='WARNING'):
+            response = self.client.get(reverse('posts:index'))
+
+        self.assertGreater(response.wsgi_request.query_count, 0)
+
+
+TEMP_METRICS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR)
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='HasNoName')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+        cls.admin = User.objects.create(username='Admin', is_staff=True)
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def test_metrics_page_is_admin_only(self):
+        """Only staff can read metrics."""
+        response = self.authorized_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+
+        response = self.admin_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_contain_view_histograms(self):
+        """Requests are counted in per-view histograms."""
+        self.client.get(reverse('posts:index'))
+        content = self.admin_client.get(reverse('metrics')).content.decode()
+
+        for metric in ('request_latency_seconds', 'db_time_seconds',
+                       'template_render_seconds', 'response_size_bytes'):
+            with self.subTest(metric=metric):
+                self.assertIn(
+                    f'yatube_{metric}_count{{view="posts:index"}}', content
+                )
+
+    def test_metrics_sum_worker_dumps(self):
+        """Dumps of other workers are added to own totals."""
+        self.client.get(reverse('posts:index'))
+        registry.flush()
+        own = registry.collect()
+        key = ('response_size_bytes', 'posts:index')
+        other_worker = f'{TEMP_METRICS_DIR}/0.json'
+        shutil.copy(f'{TEMP_METRICS_DIR}/{os.getpid()}.json', other_worker)
+        self.addCleanup(os.remove, other_worker)
+
+        self.assertEqual(registry.collect()[key], [
+            value * 2 for value in own[key]
+        ])
+
+
+TEMP_PROFILE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    DEBUG=True,
+    TEMPLATE_PROFILING=True,
+    TEMPLATE_PROFILE_LOG=os.path.join(TEMP_PROFILE_DIR, 'templates.jsonl'),
+)
+class TemplateProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='HasNoName')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILE_DIR, ignore_errors=True)
+
+    def test_nodes_are_profiled_per_request(self):
+        """Slowest nodes go to the header and the report."""
+        response = Client().get(reverse('posts:index'))
+        self.assertIn("posts/index.html: {% extends 'base.html' %}",
+                      response[TEMPLATE_PROFILE_HEADER])
+
+        out = StringIO()
+        call_command('template_profile', top=50, stdout=out)
+        self.assertIn("posts/index.html: {% include 'includes/post.html'",
+                      out.getvalue())
+        self.assertIn("includes/post.html: {% url 'posts:profile'",
+                      out.getvalue())
+
+
+@override_settings(PROFILING_DIR=os.path.join(TEMP_PROFILE_DIR, 'requests'))
+class ProfilingTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        shutil.rmtree(settings.PROFILING_DIR, ignore_errors=True)
+
+    def get_profiles(self):
+        return os.listdir(settings.PROFILING_DIR)
+
+    def test_signed_header_profiles_request(self):
+        """Request with a signed header is profiled."""
+        self.client.get(
+            reverse('posts:index'), HTTP_X_PROFILE=profile_header_value()
+        )
+
+        profiles = self.get_profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertTrue(profiles[0].startswith('posts-index.'))
+
+        out = StringIO()
+        call_command('profile_report', view='posts:index', stdout=out)
+        self.assertIn('posts:index: 1 profiles', out.getvalue())
+
+    def test_forged_header_is_ignored(self):
+        """Request with a bad signature is not profiled."""
+        self.client.get(reverse('posts:index'), HTTP_X_PROFILE='profile:1')
+
+        self.assertFalse(os.path.exists(settings.PROFILING_DIR))
+
+    def test_expired_header_is_ignored(self):
+        """Signed header older than PROFILE_TOKEN_MAX_AGE is refused."""
+        signed_at = time.time() - settings.PROFILE_TOKEN_MAX_AGE - 1
+        with mock.patch('django.core.signing.time.time',
+                        return_value=signed_at):
+            header = profile_header_value()
+
+        self.client.get(reverse('posts:index'), HTTP_X_PROFILE=header)
+
+        self.assertFalse(os.path.exists(settings.PROFILING_DIR))
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_MAX_FILES=2)
+    def test_profiles_are_rotated(self):
+        """Only the newest profiles are kept."""
+        for _ in range(3):
+            self.client.get(reverse('posts:index'))
+
+        self.assertEqual(len(self.get_profiles()), 2)
+
+
+class SlowQueryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='HasNoName')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_slow_queries_are_logged_with_plan(self):
+        """Slow queries are saved with view name and query plan."""
+        with self.assertLogs('core.slow_queries', level='WARNING'):
+            self.client.get(reverse('posts:index'))
+
+        slow_query = SlowQuery.objects.filter(
+            sql__startswith='SELECT COUNT(*)'
+        ).get()
+        self.assertEqual(slow_query.view, 'posts:index')
+        self.assertIn('posts_post', slow_query.plan)
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_failed_recording_keeps_the_page(self):
+        """Failing EXPLAIN or insert is logged, the page is still served."""
+        failures = (
+            mock.patch('core.middleware.explain_query',
+                       side_effect=DatabaseError('no plan')),
+            mock.patch.object(SlowQuery.objects, 'create',
+                              side_effect=DatabaseError('no table')),
+        )
+        for failure in failures:
+            with self.subTest(failure=failure.attribute), failure:
+                cache.clear()
+                with self.assertLogs('core.middleware', level='ERROR'):
+                    response = self.client.get(reverse('posts:index'))
+                self.assertEqual(response.status_code, 200)
+
+        self.assertTrue(SlowQuery.objects.exists())
+        self.assertFalse(SlowQuery.objects.exclude(plan='').exists())
+
+    def test_fast_queries_are_not_logged(self):
+        """Queries below the threshold are not saved."""
+        self.client.get(reverse('posts:index'))
+
+        self.assertFalse(SlowQuery.objects.exists())
+
+
+class ReadinessTests(TestCase):
+    def tearDown(self) -> None:
+        warmup._warm.clear()
+
+    @override_settings(WARM_UP_ON_START=True)
+    def test_not_ready_until_warm(self):
+        """Readiness probe fails until warm-up is done."""
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 503)
+
+        warmup.mark_warm()
+
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'ready': True})
+
+    @override_settings(WARM_UP_ON_START=True)
+    def test_not_ready_during_background_warm_up(self):
+        """Worker answers 503 while warm-up runs in the background."""
+        release = threading.Event()
+
+        def slow_warm_up(pages, groups):
+            release.wait(5)
+            warmup.mark_warm()
+
+        with mock.patch('posts.warmup.warm_up', slow_warm_up):
+            thread = start_warm_up(1, 1)
+            response = self.client.get(reverse('ready'))
+            release.set()
+            thread.join(5)
+
+        self.assertEqual(response.status_code, 503)
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(WSGI_PRELOAD=False, WARM_UP_ON_START=True)
+    def test_wsgi_does_not_block_on_warm_up(self):
+        """WSGI module starts warm-up after the application is created."""
+        with mock.patch('posts.warmup.start_warm_up') as start:
+            sys.modules.pop('yatube.wsgi', None)
+            wsgi = importlib.import_module('yatube.wsgi')
+
+        self.assertTrue(callable(wsgi.application))
+        start.assert_called_once_with(
+            settings.WARM_UP_PAGES, settings.WARM_UP_GROUPS
+        )
+
+    @override_settings(WARM_UP_ON_START=False)
+    def test_ready_without_warm_up(self):
+        """Worker without warm-up is ready at once."""
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_compile_templates(self):
+        """Project templates are compiled."""
+        self.assertGreater(warmup.compile_templates(), 0)
+
+    def test_import_views(self):
+        """URLconf with every view module is loaded."""
+        self.assertGreater(warmup.import_views(), 0)
+
+
+class HashedStorageTests(TestCase):
+    def setUp(self) -> None:
+        self.location = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+        self.storage = HashedFileSystemStorage(location=self.location)
+
+    def test_sharded_name(self):
+        """File is stored under its hash in shard directories."""
+        name = self.storage.save('posts/Cat.JPG', ContentFile(b'cat'))
+
+        self.assertTrue(self.storage.is_hashed(name))
+        self.assertRegex(name, r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/\w{64}\.jpg$')
+        self.assertEqual(self.storage.open(name).read(), b'cat')
+
+    def test_duplicates_are_stored_once(self):
+        """Same content under different names is one referenced file."""
+        first = self.storage.save('posts/a.jpg', ContentFile(b'cat'))
+        second = self.storage.save('posts/b.jpg', ContentFile(b'cat'))
+        other = self.storage.save('posts/c.jpg', ContentFile(b'dog'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(StoredFile.objects.get(name=first).refs, 2)
+
+    def test_delete_last_reference(self):
+        """File is removed only with its last reference."""
+        name = self.storage.save('posts/a.jpg', ContentFile(b'cat'))
+        self.storage.save('posts/b.jpg', ContentFile(b'cat'))
+
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_save_restores_missing_file(self):
+        """Saving content whose file is gone puts the file back."""
+        name = self.storage.save('posts/a.jpg', ContentFile(b'cat'))
+        os.remove(self.storage.path(name))
+
+        self.assertEqual(
+            self.storage.save('posts/b.jpg', ContentFile(b'cat')), name
+        )
+        self.assertEqual(self.storage.open(name).read(), b'cat')
+        self.assertEqual(StoredFile.objects.get(name=name).refs, 2)
+        self.assertEqual(
+            [entry for entry in os.listdir(self.location)
+             if entry.startswith('.upload-')],
+            [],
+        )
+
+    def test_untracked_file_is_kept(self):
+        """Files saved before hashing are never deleted."""
+        path = os.path.join(self.location, 'old.jpg')
+        with open(path, 'wb') as file:
+            file.write(b'cat')
+
+        self.storage.delete('old.jpg')
+
+        self.assertTrue(os.path.exists(path))
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_SENDFILE=None)
+class MediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='HasNoName')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user,
+            image=ContentFile(TEST_GIF, name='small.gif'),
+        )
+        cls.url = settings.MEDIA_URL + cls.post.image.name
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get(self, client=None, **headers):
+        response = (client or self.client).get(self.url, **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def test_file_response(self):
+        """Published image is streamed with long-term cache headers."""
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), TEST_GIF)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Content-Length'], str(len(TEST_GIF)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+    def get_thumbnail(self, client=None, image=None):
+        thumbnail = get_thumbnail(image or self.post.image, '10x10')
+        response = (client or self.client).get(
+            settings.MEDIA_URL + thumbnail.name
+        )
+        self.addCleanup(response.close)
+        return response
+
+    def test_thumbnail(self):
+        """Thumbnail of a published hashed image is cached for long."""
+        response = self.get_thumbnail()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_pending_post_thumbnail(self):
+        """Thumbnail of an unpublished post is shown to its author only."""
+        Post.objects.filter(pk=self.post.pk).update(status=Post.PENDING)
+
+        self.assertEqual(self.get_thumbnail().status_code, 404)
+
+        response = self.get_thumbnail(self.authorized_client)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_legacy_image_thumbnail(self):
+        """Thumbnail of an image under a legacy name may be replaced."""
+        name = 'posts/legacy.gif'
+        path = os.path.join(TEMP_MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(TEST_GIF)
+        post = Post.objects.create(text='Старый пост', author=self.user)
+        Post.objects.filter(pk=post.pk).update(image=name)
+        post.refresh_from_db()
+
+        response = self.get_thumbnail(image=post.image)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=3600', response['Cache-Control'])
+
+    def test_thumbnail_source_lookup(self):
+        """Source of a thumbnail is found without scanning the store."""
+        thumbnail = get_thumbnail(self.post.image, '10x10')
+
+        with self.assertNumQueries(0):
+            source = thumbnail_source(thumbnail.name)
+
+        self.assertEqual(source, self.post.image.name)
+
+    def test_unknown_thumbnail(self):
+        """Thumbnail unknown to the key-value store is not served."""
+        thumbnail = get_thumbnail(self.post.image, '10x10')
+        cache.clear()
+        KVStore.objects.all().delete()
+
+        response = self.client.get(settings.MEDIA_URL + thumbnail.name)
+        self.addCleanup(response.close)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_range(self):
+        """Range request gets the partial content."""
+        response = self.get(HTTP_RANGE='bytes=2-5')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), TEST_GIF[2:6])
+        self.assertEqual(
+            response['Content-Range'], f'bytes 2-5/{len(TEST_GIF)}'
+        )
+        self.assertEqual(response['Content-Length'], '4')
+
+    def test_range_not_satisfiable(self):
+        """Range past the end of the file is answered with 416."""
+        response = self.get(HTTP_RANGE=f'bytes={len(TEST_GIF)}-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(TEST_GIF)}')
+
+    def test_not_modified(self):
+        """Unchanged file is answered with 304."""
+        last_modified = self.get()['Last-Modified']
+
+        response = self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(MEDIA_SENDFILE='X-Accel-Redirect')
+    def test_accel_redirect(self):
+        """With a front server the view only names the file."""
+        response = self.get()
+
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            settings.MEDIA_ACCEL_REDIRECT_URL + self.post.image.name,
+        )
+        self.assertEqual(response.content, b'')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    @override_settings(MEDIA_SENDFILE='X-Sendfile')
+    def test_sendfile(self):
+        """X-Sendfile carries the path of the file."""
+        response = self.get()
+
+        self.assertEqual(response['X-Sendfile'], self.post.image.path)
+
+    def test_pending_post_image(self):
+        """Image of an unpublished post is shown to its author only."""
+        Post.objects.filter(pk=self.post.pk).update(status=Post.PENDING)
+
+        self.assertEqual(self.get().status_code, 404)
+
+        response = self.get(self.authorized_client)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_outside_media_root(self):
+        """Paths leaving MEDIA_ROOT or unknown files are not served."""
+        paths = (
+            'posts/../../manage.py',
+            'posts/missing.gif',
+            'other/file.txt',
+        )
+        for path in paths:
+            with self.subTest(path=path):
+                response = self.client.get(settings.MEDIA_URL + path)
+                self.assertEqual(response.status_code, 404)
+
+    def test_parse_range(self):
+        """Single ranges are parsed, the rest is ignored."""
+        cases = {
+            'bytes=0-9': (0, 9),
+            'bytes=5-': (5, 99),
+            'bytes=-10': (90, 99),
+            'bytes=90-200': (90, 99),
+            'bytes=0-1,5-6': None,
+            'items=0-9': None,
+            'bytes=9-0': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 100), expected)
+
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=100-', 100)
@@ -0,0 +1,112 @@
+from io import BytesIO
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from PIL import Image, ImageOps
+
+# Magic bytes of the formats we accept; WebP is RIFF....WEBP
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+)
+SNIFF_BYTES: int = 12
+# Image.info keys of metadata that is dropped on re-encoding
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment')
+# Raised by normalize_image for files that only break when decoded
+BROKEN_IMAGE_ERRORS = (OSError, Image.DecompressionBombError)
+
+
+def sniff_image_format(header: bytes) -> Optional[str]:
+    """Image format by the first bytes of the file, None if unknown."""
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'WEBP'
+    for signature, image_format in SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    return None
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """
+    Reject non-images and oversized files while the body streams in.
+
+    Goes first in FILE_UPLOAD_HANDLERS: it looks at every chunk before
+    the memory or temporary file handlers store it, and on the first
+    bad chunk skips the rest of the file instead of buffering it. The
+    reason is kept in request.upload_errors for the form to show.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header = b''
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        limit = settings.UPLOAD_IMAGE_MAX_BYTES
+        if self.received > limit:
+            self.reject(f'Файл больше {limit // 1024 // 1024} МБ.')
+
+        if len(self.header) < SNIFF_BYTES:
+            self.header += raw_data[:SNIFF_BYTES - len(self.header)]
+            if (len(self.header) == SNIFF_BYTES
+                    and sniff_image_format(self.header) is None):
+                self.reject('Загрузите изображение JPEG, PNG, GIF или WebP.')
+
+        return raw_data
+
+    def file_complete(self, file_size):
+        # Files shorter than the header are left to the form field.
+        return None
+
+    def reject(self, message: str):
+        if not hasattr(self.request, 'upload_errors'):
+            self.request.upload_errors = {}
+        self.request.upload_errors[self.field_name] = message
+        raise SkipFile(message)
+
+
+def normalize_image(file, max_dimension: int) -> Optional[SimpleUploadedFile]:
+    """
+    Copy of an uploaded image without metadata and at most max_dimension
+    pixels on the long side, None if the upload is fine as it is.
+
+    EXIF orientation is applied before it is dropped. Large JPEGs are
+    decoded at a reduced scale, so a 6000px photo never takes its full
+    size in memory. Animated images are kept as they are.
+    A header can pass the checks of the upload handler and the form
+    field while the data is truncated or too large to decode: that
+    raises one of BROKEN_IMAGE_ERRORS.
+    """
+    file.seek(0)
+    image = Image.open(file)
+    image_format = image.format
+    if getattr(image, 'is_animated', False):
+        return None
+
+    too_big = max(image.size) > max_dimension
+    has_metadata = any(key in image.info for key in METADATA_KEYS)
+    if not (too_big or has_metadata):
+        return None
+
+    if image_format == 'JPEG':
+        image.draft('RGB', (max_dimension, max_dimension))
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    options = {'optimize': True}
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = settings.UPLOAD_IMAGE_QUALITY
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return SimpleUploadedFile(
+        file.name, buffer.getvalue(), content_type=Image.MIME[image_format]
+    )
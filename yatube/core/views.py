@@ -1,4 +1,19 @@
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.module_loading import import_string
+
+from .media import serve_media
+from .metrics import registry, render_prometheus
+from .warmup import is_warm
+
+PROMETHEUS_CONTENT_TYPE: str = 'text/plain; version=0.0.4; charset=utf-8'
 
 
 def page_not_found(request, exception):
@@ -15,3 +30,34 @@ def permission_denied(request, exception):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+@staff_member_required
+def metrics(request):
+    """Per-view histograms of all workers in Prometheus text format."""
+    return HttpResponse(
+        render_prometheus(registry.collect()),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
+
+
+def ready(request):
+    """Readiness probe: 503 until the worker is warmed up."""
+    warm = is_warm()
+    return JsonResponse({'ready': warm}, status=200 if warm else 503)
+
+
+def media(request, path):
+    """Uploaded file, if the MEDIA_ACCESS function lets the request see it."""
+    name = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    cache_control = import_string(settings.MEDIA_ACCESS)(request, name)
+    if cache_control is None:
+        raise Http404
+    return serve_media(request, name, cache_control)
@@ -0,0 +1,39 @@
+import os
+import threading
+
+from django.conf import settings
+from django.template import Engine
+from django.urls import get_resolver
+
+_warm = threading.Event()
+
+
+def mark_warm() -> None:
+    _warm.set()
+
+
+def is_warm() -> bool:
+    """Warm-up of this process is done or not required."""
+    return _warm.is_set() or not settings.WARM_UP_ON_START
+
+
+def compile_templates() -> int:
+    """Compile project templates into the cached loader, return count."""
+    engine = Engine.get_default()
+    count = 0
+
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if not name.endswith('.html'):
+                    continue
+                path = os.path.join(root, name)
+                engine.get_template(os.path.relpath(path, directory))
+                count += 1
+
+    return count
+
+
+def import_views() -> int:
+    """Import every view module through the URLconf, return name count."""
+    return len(get_resolver().reverse_dict)
@@ -0,0 +1,31 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'task', 'status', 'priority', 'attempts', 'run_at', 'created',
+    )
+    list_filter = ('status', 'task')
+    search_fields = ('task',)
+    readonly_fields = (
+        'attempts', 'locked_by', 'locked_until', 'last_error', 'created',
+        'finished',
+    )
+    actions = ('retry',)
+    empty_value_display = '-пусто-'
+
+    def retry(self, request, queryset):
+        queryset.update(
+            status=Job.QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            locked_until=None,
+        )
+
+    retry.short_description = 'Перезапустить'
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,34 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import POOLS, Worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued jobs: moderation, thumbnails, email. '
+        'SIGTERM or Ctrl+C lets running jobs finish.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--pool', choices=POOLS, default='thread')
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit when no due jobs are left.',
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(options['concurrency'], options['pool'])
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: worker.stop())
+
+        self.stdout.write(
+            f'Worker {worker.id}: {options["pool"]} pool '
+            f'of {options["concurrency"]}'
+        )
+        processed = worker.run(burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS(f'{processed} jobs done'))
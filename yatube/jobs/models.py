@@ -0,0 +1,54 @@
+from django.db import models
+from django.utils import timezone
+
+PRIORITY_HIGH: int = 10
+PRIORITY_NORMAL: int = 0
+PRIORITY_LOW: int = -10
+
+
+class Job(models.Model):
+    """
+    Task call waiting for a worker.
+
+    A claimed job is RUNNING until locked_until; if the worker dies
+    before finishing it, the job becomes visible to others again.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнено'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField('Задача', max_length=200)
+    kwargs = models.TextField('Аргументы', default='{}')
+    priority = models.SmallIntegerField('Приоритет', default=PRIORITY_NORMAL)
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Максимум попыток')
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    locked_by = models.CharField('Воркер', max_length=100, blank=True)
+    locked_until = models.DateTimeField('Занята до', blank=True, null=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', blank=True, null=True)
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=('status', 'priority', 'run_at'),
+                name='jobs_job_due_idx',
+            ),
+        )
+        verbose_name = 'Задание'
+        verbose_name_plural = 'Задания'
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
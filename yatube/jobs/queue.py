@@ -0,0 +1,66 @@
+import json
+from datetime import timedelta
+from typing import Callable, Dict, NamedTuple, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import PRIORITY_NORMAL, Job
+
+
+class Task(NamedTuple):
+    func: Callable
+    priority: int
+    # None - JOBS_MAX_ATTEMPTS and JOBS_VISIBILITY_TIMEOUT
+    max_attempts: Optional[int]
+    timeout: Optional[int]
+
+
+TASKS: Dict[str, Task] = {}
+
+
+def task(name: str, *, priority: int = PRIORITY_NORMAL,
+         max_attempts: Optional[int] = None,
+         timeout: Optional[int] = None) -> Callable:
+    """
+    Register a function as a task, e.g. @task('users.send_password_reset').
+
+    The function stays callable inline and gets .enqueue(**kwargs).
+    """
+    def decorator(func: Callable) -> Callable:
+        TASKS[name] = Task(func, priority, max_attempts, timeout)
+        func.enqueue = lambda **kwargs: enqueue(name, kwargs)
+        return func
+
+    return decorator
+
+
+def enqueue(name: str, kwargs: dict, priority: Optional[int] = None,
+            delay: float = 0) -> Job:
+    """
+    Save a job for the task, kwargs must be JSON serializable.
+
+    The job is a row in the same transaction as the caller's writes, so
+    workers see it only if the request commits.
+    """
+    if name not in TASKS:
+        raise ValueError(f'Unknown task: {name}')
+
+    registered = TASKS[name]
+
+    return Job.objects.create(
+        task=name,
+        kwargs=json.dumps(kwargs),
+        priority=registered.priority if priority is None else priority,
+        max_attempts=registered.max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def get_timeout(name: str) -> int:
+    """Seconds a claimed job of the task stays invisible to others."""
+    registered = TASKS.get(name)
+    if registered is None or registered.timeout is None:
+        return settings.JOBS_VISIBILITY_TIMEOUT
+
+    return registered.timeout
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import PRIORITY_HIGH, Job
+from .queue import enqueue, task
+from .worker import claim, work_off
+
+calls = []
+
+
+@task('jobs.tests.record')
+def record(value: str) -> None:
+    calls.append(value)
+
+
+@task('jobs.tests.fail', max_attempts=2)
+def fail() -> None:
+    raise RuntimeError('Boom')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self) -> None:
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        """Enqueued job runs in a worker and is marked done."""
+        record.enqueue(value='first')
+        self.assertEqual(calls, [])
+
+        self.assertEqual(work_off(), 1)
+
+        job = Job.objects.get()
+        self.assertEqual(calls, ['first'])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finished)
+
+    def test_priority_order(self):
+        """Higher priority jobs run first, then older ones."""
+        record.enqueue(value='normal')
+        enqueue('jobs.tests.record', {'value': 'high'}, PRIORITY_HIGH)
+        record.enqueue(value='normal later')
+
+        work_off()
+
+        self.assertEqual(calls, ['high', 'normal', 'normal later'])
+
+    def test_delay(self):
+        """Delayed job does not run before its time."""
+        enqueue('jobs.tests.record', {'value': 'later'}, delay=60)
+
+        self.assertEqual(work_off(), 0)
+
+    def test_unknown_task(self):
+        """Only registered tasks can be enqueued."""
+        with self.assertRaises(ValueError):
+            enqueue('jobs.tests.missing', {})
+
+    @override_settings(JOBS_RETRY_DELAY=0)
+    def test_retry_then_fail(self):
+        """Failed job is retried up to max_attempts, then marked failed."""
+        fail.enqueue()
+
+        self.assertEqual(work_off(1), 1)
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('Boom', job.last_error)
+
+        self.assertEqual(work_off(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(JOBS_RETRY_DELAY=60)
+    def test_retry_backoff(self):
+        """Failed job waits before the next attempt."""
+        fail.enqueue()
+        work_off()
+
+        job = Job.objects.get()
+        self.assertGreater(
+            job.run_at, timezone.now() + timedelta(seconds=50)
+        )
+
+    def test_claimed_job_is_invisible(self):
+        """Claimed job is hidden from other workers until the lock expires."""
+        record.enqueue(value='once')
+
+        self.assertEqual(len(claim('first', 10)), 1)
+        self.assertEqual(claim('second', 10), [])
+
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(len(claim('second', 10)), 1)
+        self.assertEqual(Job.objects.get().attempts, 2)
+
+    def test_expired_last_attempt_fails(self):
+        """Job whose worker died on the last attempt is marked failed."""
+        fail.enqueue()
+        claim('first', 1)
+        Job.objects.update(
+            attempts=2, locked_until=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(claim('second', 1), [])
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
@@ -0,0 +1,181 @@
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import time
+import traceback
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from datetime import timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+from .queue import TASKS, get_timeout
+
+logger = logging.getLogger(__name__)
+
+POOLS = ('thread', 'process')
+
+
+def due_jobs():
+    """Queued jobs whose time has come and running jobs whose lock expired."""
+    now = timezone.now()
+
+    return Job.objects.filter(
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_until__lt=now)
+    )
+
+
+def claim(worker_id: str, limit: int) -> List[int]:
+    """
+    Lock up to limit due jobs for the worker, highest priority first.
+
+    Every job is taken with a conditional UPDATE, so concurrent workers
+    never run the same attempt, with no SELECT FOR UPDATE on SQLite.
+    """
+    now = timezone.now()
+    Job.objects.filter(
+        status=Job.RUNNING,
+        locked_until__lt=now,
+        attempts__gte=F('max_attempts'),
+    ).update(
+        status=Job.FAILED,
+        last_error='Visibility timeout expired on the last attempt.',
+        finished=now,
+    )
+
+    candidates = due_jobs().order_by('-priority', 'run_at').values_list(
+        'pk', 'task'
+    )[:limit]
+    claimed: List[int] = []
+
+    for pk, name in candidates:
+        locked = due_jobs().filter(pk=pk).update(
+            status=Job.RUNNING,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=get_timeout(name)),
+            attempts=F('attempts') + 1,
+        )
+        if locked:
+            claimed.append(pk)
+
+    return claimed
+
+
+def execute(pk: int) -> bool:
+    """Run a claimed job, then mark it done or schedule a retry."""
+    job = Job.objects.get(pk=pk)
+    # The attempt number fences off a worker whose lock expired.
+    attempt = Job.objects.filter(
+        pk=pk, status=Job.RUNNING, attempts=job.attempts
+    )
+
+    try:
+        TASKS[job.task].func(**json.loads(job.kwargs))
+    except Exception:
+        logger.exception('Job %s failed on attempt %s', job, job.attempts)
+        error = traceback.format_exc()
+
+        if job.attempts >= job.max_attempts:
+            attempt.update(
+                status=Job.FAILED, last_error=error, finished=timezone.now()
+            )
+        else:
+            delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            attempt.update(
+                status=Job.QUEUED,
+                last_error=error,
+                run_at=timezone.now() + timedelta(seconds=delay),
+                locked_until=None,
+            )
+        return False
+
+    attempt.update(
+        status=Job.DONE, finished=timezone.now(), locked_until=None
+    )
+    return True
+
+
+def work_off(limit: Optional[int] = None) -> int:
+    """Run due jobs one by one in this thread, return how many ran."""
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    processed = 0
+
+    while limit is None or processed < limit:
+        pks = claim(worker_id, 1)
+        if not pks:
+            break
+        execute(pks[0])
+        processed += 1
+
+    return processed
+
+
+class Worker:
+    """Claim due jobs and run them on a thread or process pool."""
+
+    def __init__(self, concurrency: int = 4, pool: str = 'thread'):
+        self.id = f'{socket.gethostname()}:{os.getpid()}'
+        self.concurrency = concurrency
+        self.pool = pool
+        self.stopping = False
+
+    def stop(self) -> None:
+        """Finish running jobs and exit, claiming nothing new."""
+        self.stopping = True
+
+    def make_executor(self):
+        if self.pool == 'process':
+            # Children inherit registered tasks and settings by fork.
+            return ProcessPoolExecutor(
+                self.concurrency,
+                mp_context=multiprocessing.get_context('fork'),
+            )
+        return ThreadPoolExecutor(self.concurrency)
+
+    def run(self, burst: bool = False) -> int:
+        """
+        Process jobs until stop(), return how many ran.
+
+        With burst the worker exits once the queue has no due jobs.
+        """
+        running = set()
+        processed = 0
+
+        with self.make_executor() as executor:
+            while not self.stopping:
+                free = self.concurrency - len(running)
+                pks = claim(self.id, free) if free else []
+
+                if pks and self.pool == 'process':
+                    # A forked child must open its own connection.
+                    connections.close_all()
+                for pk in pks:
+                    running.add(executor.submit(execute, pk))
+
+                if not running:
+                    if burst:
+                        break
+                    time.sleep(settings.JOBS_POLL_SECONDS)
+                    continue
+
+                done, running = wait(
+                    running,
+                    timeout=settings.JOBS_POLL_SECONDS,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    processed += 1
+                    if future.exception() is not None:
+                        logger.error(
+                            'Worker pool error', exc_info=future.exception()
+                        )
+
+        return processed
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import CensoredWord, Comment, Group, Post
+from .models import CensoredWord, Comment, Group, ImportCheckpoint, Post
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -12,6 +12,7 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
+    list_select_related = ('author', 'group')
     list_editable = ('group',)
     # Fields for search
     search_fields = ('text',)
@@ -34,10 +35,16 @@ class CensoredWordAdmin(admin.ModelAdmin):
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('pk', 'post', 'author', 'text', 'created')
+    list_select_related = ('post', 'author')
     search_fields = ('post', 'author', 'text')
     empty_value_display = '-пусто-'
 
 
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('source', 'line', 'updated')
+    search_fields = ('source',)
+
+
 admin.site.register(Post, PostAdmin)
 
 admin.site.register(Group, GroupAdmin)
@@ -45,3 +52,5 @@ admin.site.register(Group, GroupAdmin)
 admin.site.register(CensoredWord, CensoredWordAdmin)
 
 admin.site.register(Comment, CommentAdmin)
+
+admin.site.register(ImportCheckpoint, ImportCheckpointAdmin)
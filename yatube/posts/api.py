@@ -0,0 +1,258 @@
+"""
+Read-only JSON API.
+
+Lists are keyset-paginated (?cursor=, ?limit=) and every endpoint takes
+?fields= to return only some fields. Rows come from values() without
+instantiating models, except in the batch endpoint, which can render
+cards; guest-only endpoints share the short page cache of the HTML
+feeds, and all send an ETag for conditional GET.
+"""
+from typing import Dict, List
+
+from django.db.models import Model, Q
+from django.db.models.fields.files import FieldFile, ImageFieldFile
+from django.http import JsonResponse
+from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_GET
+
+from core.api import (ApiError, api_view, conditional_get, get_ids,
+                      keyset_page, select_fields)
+
+from .cards import render_cards
+from .models import Comment, Follow, Group, Post, User
+from .thumbnails import prefetch_thumbnails
+
+# Same lifetime as the cached index page
+CACHE_SECONDS: int = 20
+POST_FIELDS: Dict[str, str] = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'status': 'status',
+    'image': 'image',
+    'image_width': 'image_width',
+    'image_height': 'image_height',
+    'image_placeholder': 'image_placeholder',
+    'thumbnail': 'image',
+}
+POST_KEYS = ('-pub_date', '-id')
+COMMENT_FIELDS: Dict[str, str] = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+COMMENT_KEYS = ('-created', '-id')
+GROUP_FIELDS: Dict[str, str] = {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+}
+GROUP_KEYS = ('id',)
+BATCH_FORMATS = ('json', 'cards')
+PROFILE_FIELDS: Dict[str, str] = {
+    'id': 'id',
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    # Counted with a query each, only when selected
+    'posts': 'posts',
+    'followers': 'followers',
+    'following': 'following',
+}
+
+
+class ImageHolder:
+    """Stands for a post in prefetch_thumbnails, which keys on posts."""
+
+    def __init__(self, name: str):
+        # Thumbnail keys depend on the storage, hence a real field file.
+        self.image = ImageFieldFile(None, Post.image.field, name)
+
+
+def present_posts(posts: List[dict]) -> List[dict]:
+    """Image names to URLs, thumbnails of the page in one lookup."""
+    field = Post.image.field
+    if posts and 'thumbnail' in posts[0]:
+        holders = [ImageHolder(post['thumbnail']) for post in posts]
+        prefetch_thumbnails(holders)
+        for post, holder in zip(posts, holders):
+            thumbnail = getattr(holder, 'thumbnail', None)
+            post['thumbnail'] = thumbnail._asdict() if thumbnail else None
+
+    if posts and 'image' in posts[0]:
+        for post in posts:
+            post['image'] = (
+                field.storage.url(post['image']) if post['image'] else None
+            )
+    return posts
+
+
+def instance_fields(instance: Model, fields: Dict[str, str]) -> dict:
+    """Same dict as from values(), for a model instance with its relations."""
+    row = {}
+    for name, path in fields.items():
+        value = instance
+        for attribute in path.split('__'):
+            if value is None:
+                break
+            value = getattr(value, attribute)
+        row[name] = value.name if isinstance(value, FieldFile) else value
+    return row
+
+
+def visible_posts(request):
+    """Published posts and, for a user, their own unpublished ones."""
+    visible = Q(status=Post.PUBLISHED)
+    if request.user.is_authenticated:
+        visible |= Q(author=request.user)
+    return Post.objects.filter(visible)
+
+
+def get_one(queryset, fields: Dict[str, str], **lookups) -> dict:
+    row = queryset.filter(**lookups).values(*fields.values()).first()
+    if row is None:
+        raise ApiError('Not found', status=404)
+    return {name: row[path] for name, path in fields.items()}
+
+
+def api_get(view):
+    """GET-only JSON view with ETags, see core.api."""
+    return require_GET(conditional_get(api_view(view)))
+
+
+@api_get
+@cache_page(CACHE_SECONDS)
+def posts(request):
+    """Published posts, newest first, of ?group=slug or ?author=username."""
+    queryset = Post.objects.published()
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+
+    page = keyset_page(
+        request, queryset, select_fields(request, POST_FIELDS), POST_KEYS
+    )
+    present_posts(page['results'])
+    return JsonResponse(page)
+
+
+@api_get
+def post(request, post_id):
+    """One post, an unpublished one only for its author."""
+    fields = select_fields(request, POST_FIELDS)
+    post = get_one(visible_posts(request), fields, pk=post_id)
+    return JsonResponse(present_posts([post])[0])
+
+
+@api_get
+def batch(request):
+    """
+    Posts of ?ids=1,2,3 in that order, with one query for all of them.
+
+    ?format=cards gives {"id", "html"} of feed cards instead of fields.
+    Ids of posts not found or not visible are listed in "missing".
+    """
+    ids = get_ids(request)
+    output_format = request.GET.get('format', 'json')
+    if output_format not in BATCH_FORMATS:
+        raise ApiError(f'Unknown format: {output_format}')
+    fields = select_fields(request, POST_FIELDS)
+
+    posts = visible_posts(request)
+    if output_format == 'cards':
+        posts = posts.for_feed()
+    else:
+        posts = posts.select_related('author', 'group')
+    posts = posts.in_bulk(ids)
+    found = [posts[pk] for pk in ids if pk in posts]
+    if output_format == 'cards':
+        cards = render_cards(found)
+        results = [{'id': post.pk, 'html': cards[post.pk]} for post in found]
+    else:
+        results = present_posts(
+            [instance_fields(post, fields) for post in found]
+        )
+
+    return JsonResponse({
+        'results': results,
+        'missing': [pk for pk in ids if pk not in posts],
+    })
+
+
+@api_get
+@cache_page(CACHE_SECONDS)
+def comments(request, post_id):
+    """Comments of a published post, newest first."""
+    if not Post.objects.published().filter(pk=post_id).exists():
+        raise ApiError('Not found', status=404)
+
+    return JsonResponse(keyset_page(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        select_fields(request, COMMENT_FIELDS),
+        COMMENT_KEYS,
+    ))
+
+
+@api_get
+@cache_page(CACHE_SECONDS)
+def groups(request):
+    """All groups in the order they were created."""
+    return JsonResponse(keyset_page(
+        request,
+        Group.objects.all(),
+        select_fields(request, GROUP_FIELDS),
+        GROUP_KEYS,
+    ))
+
+
+@api_get
+@cache_page(CACHE_SECONDS)
+def group(request, slug):
+    return JsonResponse(
+        get_one(Group.objects, select_fields(request, GROUP_FIELDS), slug=slug)
+    )
+
+
+@api_get
+@cache_page(CACHE_SECONDS)
+def profile(request, username):
+    """Author with counts of published posts, followers and followings."""
+    fields = select_fields(request, PROFILE_FIELDS)
+    counts = {
+        'posts': lambda pk: Post.objects.published().filter(author_id=pk),
+        'followers': lambda pk: Follow.objects.filter(author_id=pk),
+        'following': lambda pk: Follow.objects.filter(user_id=pk),
+    }
+    columns = {
+        name: path for name, path in fields.items() if name not in counts
+    }
+    user = get_one(User.objects, {**columns, 'id': 'id'}, username=username)
+
+    profile = {name: user[name] for name in columns}
+    for name in fields:
+        if name in counts:
+            profile[name] = counts[name](user['id']).count()
+    return JsonResponse(profile)
+
+
+@api_get
+def follow(request):
+    """Published posts of the authors the user follows, newest first."""
+    if not request.user.is_authenticated:
+        raise ApiError('Authentication required', status=401)
+
+    page = keyset_page(
+        request,
+        Post.objects.published().filter(author__following__user=request.user),
+        select_fields(request, POST_FIELDS),
+        POST_KEYS,
+    )
+    present_posts(page['results'])
+    return JsonResponse(page)
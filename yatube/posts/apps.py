@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if settings.MODERATION_WARM_UP:
+            from .utils import warm_up_moderation
+
+            warm_up_moderation()
@@ -0,0 +1,64 @@
+import hashlib
+import json
+from typing import Dict, Sequence
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .models import Post
+from .thumbnails import prefetch_thumbnails
+
+CARD_TEMPLATE: str = 'includes/post.html'
+CARD_CACHE_SECONDS: int = 60 * 60
+
+
+def card_key(post: Post) -> str:
+    """
+    Cache key of a rendered post card.
+
+    It hashes everything the card shows, so an edit, moderation or a new
+    author name makes a new key and no invalidation is needed. The post
+    must come from Post.objects.for_feed().
+    """
+    state = (
+        post.text,
+        post.status,
+        post.pub_date.isoformat(),
+        post.image.name,
+        post.image_placeholder,
+        post.group.slug if post.group_id else None,
+        post.author.username,
+        post.author.get_full_name(),
+    )
+    digest = hashlib.md5(json.dumps(state).encode()).hexdigest()
+    return f'post_card:{post.pk}:{digest}'
+
+
+def render_cards(posts: Sequence[Post]) -> Dict[int, str]:
+    """
+    HTML cards of the posts by id, as in the feeds.
+
+    Cached cards come in one cache lookup, the rest are rendered with
+    their thumbnails prefetched. A card that has to fall back to
+    {% thumbnail %} is not cached, its variants are not generated yet.
+    """
+    keys = {post.pk: card_key(post) for post in posts}
+    cached = cache.get_many(list(keys.values()))
+
+    missing = [post for post in posts if keys[post.pk] not in cached]
+    prefetch_thumbnails(missing)
+    cards = {
+        pk: cached[key] for pk, key in keys.items() if key in cached
+    }
+    fresh = {}
+    for post in missing:
+        cards[post.pk] = render_to_string(CARD_TEMPLATE, {
+            'post': post,
+            'show_group_posts_link': True,
+            # A card stands alone: no separator after it.
+            'forloop': {'last': True},
+        })
+        if not post.image or getattr(post, 'thumbnail', None):
+            fresh[keys[post.pk]] = cards[post.pk]
+    cache.set_many(fresh, CARD_CACHE_SECONDS)
+    return cards
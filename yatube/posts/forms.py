@@ -1,6 +1,10 @@
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+
+from core.uploads import BROKEN_IMAGE_ERRORS, normalize_image
 
 from .models import CensoredWord, Comment, Post
 from .utils import bad_language_validation
@@ -14,8 +18,42 @@ class PostForm(forms.ModelForm):
 
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, moderate: bool = True,
+                 upload_errors: Optional[Dict[str, str]] = None, **kwargs):
+        # Without moderate the text is checked later by a worker.
+        # upload_errors are files rejected by ImageUploadHandler.
+        super().__init__(*args, **kwargs)
+        self.moderate = moderate
+        self.upload_errors = upload_errors or {}
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, message in self.upload_errors.items():
+            if field in self.fields:
+                self.add_error(field, message)
+        return cleaned_data
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if not isinstance(image, UploadedFile):
+            return image
+
+        try:
+            normalized = normalize_image(
+                image, settings.UPLOAD_IMAGE_MAX_DIMENSION
+            )
+        except BROKEN_IMAGE_ERRORS:
+            raise forms.ValidationError(
+                'Изображение повреждено или слишком велико.',
+                code='invalid_image',
+            )
+        return normalized or image
+
     def clean_text(self):
         text: str = self.cleaned_data['text']
+        if not self.moderate:
+            return text
+
         stop_words = CensoredWord.objects.values_list('word', flat=True)
 
         data: Tuple[str, bool] = bad_language_validation(
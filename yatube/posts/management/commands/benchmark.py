@@ -0,0 +1,271 @@
+import gc
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.queries import QueryCounter
+from posts.models import Follow, Post
+
+BENCHMARKS_DIR = os.path.join(settings.BASE_DIR, 'benchmarks')
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, 'results.json')
+PERCENTILES = (50, 95, 99)
+VIEWS = (
+    'index',
+    'group_posts',
+    'profile',
+    'post_detail',
+    'post_create',
+    'post_create_long',
+    'add_comment',
+    'follow_index',
+)
+# Slowdowns below this are timer noise even if relatively large
+MIN_SLOWDOWN_MS: float = 1.0
+BENCHMARK_TEXT: str = 'Обычный пост для замера скорости.'
+# Moderation time grows with text length, queued moderation must not
+LONG_TEXT_REPEAT: int = 50
+
+
+def percentile(samples: List[float], percent: int) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time posts views on a seeded throwaway database and compare '
+        'the result with the committed baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--views',
+            nargs='+',
+            choices=VIEWS,
+            default=VIEWS,
+            help='Views to benchmark (default: all).',
+        )
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=2000)
+        parser.add_argument('--output', default=RESULTS_PATH)
+        parser.add_argument('--baseline', default=BASELINE_PATH)
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.25,
+            help='Allowed relative p50 slowdown before failing.',
+        )
+        parser.add_argument(
+            '--async-moderation',
+            action='store_true',
+            help='Run with MODERATION_ASYNC: post_create only queues a job.',
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Write the results as the new baseline.',
+        )
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+
+        try:
+            with override_settings(
+                # The test client's host, as the test runner allows it
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                MEDIA_ROOT=media_root,
+                DATABASE_REPLICAS=[],
+                MODERATION_ASYNC=options['async_moderation'],
+            ):
+                call_command(
+                    'seed',
+                    users=options['users'],
+                    posts=options['posts'],
+                    comments=options['comments'],
+                    follows=options['follows'],
+                    images=True,
+                    stdout=StringIO(),
+                )
+                results = self.run_cases(
+                    options['views'], options['iterations']
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        output = (
+            options['baseline'] if options['update_baseline']
+            else options['output']
+        )
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+        self.report(results)
+
+        if not options['update_baseline']:
+            self.compare(results, options['baseline'], options['threshold'])
+
+    def get_cases(self) -> Dict[str, tuple]:
+        """Name -> (method, url, data) of every benchmarked view."""
+        post = Post.objects.exclude(group=None).first()
+        return {
+            'index': ('get', reverse('posts:index'), None),
+            'group_posts': (
+                'get', reverse('posts:group_list', args=[post.group.slug]),
+                None,
+            ),
+            'profile': (
+                'get', reverse('posts:profile', args=[post.author.username]),
+                None,
+            ),
+            'post_detail': (
+                'get', reverse('posts:post_detail', args=[post.pk]), None,
+            ),
+            'post_create': (
+                'post', reverse('posts:post_create'),
+                {'text': BENCHMARK_TEXT, 'group': post.group.pk},
+            ),
+            'post_create_long': (
+                'post', reverse('posts:post_create'),
+                {
+                    'text': ' '.join([BENCHMARK_TEXT] * LONG_TEXT_REPEAT),
+                    'group': post.group.pk,
+                },
+            ),
+            'add_comment': (
+                'post', reverse('posts:add_comment', args=[post.pk]),
+                {'text': BENCHMARK_TEXT},
+            ),
+            'follow_index': ('get', reverse('posts:follow_index'), None),
+        }
+
+    def run_cases(self, views: List[str], iterations: int) -> dict:
+        client = Client()
+        client.force_login(Follow.objects.first().user)
+        cases = self.get_cases()
+        results = {}
+
+        for name in views:
+            method, url, data = cases[name]
+            request = getattr(client, method)
+            results[name] = {}
+
+            for mode in ('cold', 'warm'):
+                samples: List[float] = []
+                cache.clear()
+                request(url, data)
+                # Collector pauses land on random samples, keep them out.
+                gc.collect()
+                gc.disable()
+
+                try:
+                    for _ in range(iterations):
+                        if mode == 'cold':
+                            cache.clear()
+                        start = time.perf_counter()
+                        request(url, data)
+                        samples.append((time.perf_counter() - start) * 1000)
+                finally:
+                    gc.enable()
+
+                if mode == 'cold':
+                    cache.clear()
+                with QueryCounter() as counter:
+                    tracemalloc.start()
+                    request(url, data)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+
+                results[name][mode] = {
+                    **{
+                        f'p{percent}_ms': round(
+                            percentile(samples, percent), 3
+                        )
+                        for percent in PERCENTILES
+                    },
+                    'queries': counter.count,
+                    'memory_kb': round(peak / 1024, 1),
+                }
+
+        return results
+
+    def report(self, results: dict) -> None:
+        for name, modes in results.items():
+            for mode, stats in modes.items():
+                self.stdout.write(
+                    f'{name:<14}{mode:<6}'
+                    f'p50 {stats["p50_ms"]:>8.2f}ms  '
+                    f'p95 {stats["p95_ms"]:>8.2f}ms  '
+                    f'p99 {stats["p99_ms"]:>8.2f}ms  '
+                    f'{stats["queries"]:>3} queries  '
+                    f'{stats["memory_kb"]:>8.1f}KB'
+                )
+
+    def compare(self, results: dict, baseline_path: str,
+                threshold: float) -> None:
+        """
+        Fail on p50 slowdowns above threshold and on extra queries.
+
+        Tails are reported but not compared: with a few dozen samples
+        p95 and p99 are too noisy to gate on.
+        """
+        if not os.path.exists(baseline_path):
+            self.stdout.write(f'No baseline at {baseline_path}')
+            return
+
+        with open(baseline_path) as file:
+            baseline = json.load(file)
+
+        regressions: List[str] = []
+
+        for name, modes in results.items():
+            for mode, stats in modes.items():
+                expected = baseline.get(name, {}).get(mode)
+                if expected is None:
+                    continue
+
+                limit = max(
+                    expected['p50_ms'] * (1 + threshold),
+                    expected['p50_ms'] + MIN_SLOWDOWN_MS,
+                )
+                if stats['p50_ms'] > limit:
+                    regressions.append(
+                        f'{name} {mode}: p50 {stats["p50_ms"]:.2f}ms > '
+                        f'{limit:.2f}ms'
+                    )
+                if stats['queries'] > expected['queries']:
+                    regressions.append(
+                        f'{name} {mode}: {stats["queries"]} queries > '
+                        f'{expected["queries"]}'
+                    )
+
+        if regressions:
+            raise CommandError(
+                'Performance regressions:\n' + '\n'.join(regressions)
+            )
+
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
@@ -0,0 +1,61 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import EXPORTS, FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Export posts, comments or follows as JSONL or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=tuple(EXPORTS))
+        parser.add_argument(
+            '--format', dest='output_format', choices=tuple(FORMATS),
+            default='jsonl',
+        )
+        parser.add_argument('--group', help='Group slug.')
+        parser.add_argument('--author', help='Author username.')
+        parser.add_argument('--since', help='Date or datetime, inclusive.')
+        parser.add_argument('--until', help='Date or datetime, exclusive.')
+        parser.add_argument(
+            '--gzip', action='store_true', help='Compress the output.'
+        )
+        parser.add_argument(
+            '--output', '-o', help='File to write to (default: stdout).'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            chunks = stream_export(
+                options['kind'],
+                options['output_format'],
+                compress=options['gzip'],
+                group=options['group'],
+                author=options['author'],
+                since=options['since'],
+                until=options['until'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        start = time.monotonic()
+        written = 0
+        if options['output']:
+            with open(options['output'], 'wb') as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    written += len(chunk)
+        elif options['gzip']:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+                written += len(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
+                written += len(chunk)
+
+        self.stderr.write(
+            f'{written} bytes in {time.monotonic() - start:.1f}s'
+        )
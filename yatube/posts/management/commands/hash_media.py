@@ -0,0 +1,83 @@
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from core.models import StoredFile
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Move post images into the content-addressed layout, merge '
+        'duplicates and recount references. Safe to rerun.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many files would be moved.',
+        )
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        names = (
+            Post.objects.exclude(image='')
+            .order_by()
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        legacy = [name for name in names if not storage.is_hashed(name)]
+
+        if options['dry_run']:
+            self.stdout.write(f'{len(legacy)} files to move')
+            return
+
+        moved = missing = saved_bytes = 0
+        for name in legacy:
+            if not storage.exists(name):
+                self.stderr.write(f'Missing file: {name}')
+                missing += 1
+                continue
+
+            size = storage.size(name)
+            with storage.open(name) as file:
+                hashed = storage.save(name, file)
+            if StoredFile.objects.filter(name=hashed, refs__gt=1).exists():
+                saved_bytes += size
+
+            Post.objects.filter(image=name).update(image=hashed)
+            # Old thumbnails are keyed by the old name.
+            delete_thumbnails(ImageFile(name, storage), delete_file=False)
+            FileSystemStorage.delete(storage, name)
+            moved += 1
+
+        self.recount(storage)
+        self.stdout.write(self.style.SUCCESS(
+            f'{moved} files moved, {missing} missing, '
+            f'{saved_bytes / 1024:.0f}KB freed by deduplication. '
+            'Run pregenerate_thumbnails for the new names.'
+        ))
+
+    def recount(self, storage) -> None:
+        """Set references of every stored image to the posts using it."""
+        counts = (
+            Post.objects.exclude(image='')
+            .order_by()
+            .values('image')
+            .annotate(refs=Count('pk'))
+        )
+        for row in counts:
+            if not storage.exists(row['image']):
+                continue
+            StoredFile.objects.update_or_create(
+                name=row['image'],
+                defaults={
+                    'refs': row['refs'],
+                    'size': os.path.getsize(storage.path(row['image'])),
+                },
+            )
@@ -0,0 +1,357 @@
+import datetime as dt
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.dateparse import parse_datetime
+
+from posts.forms import SIMILARITY_THRESHOLD
+from posts.models import CensoredWord, Group, ImportCheckpoint, Post, User
+from posts.thumbnails import describe_image
+from posts.utils import bad_language_validation, chunked
+from posts.warmup import build_moderation_dictionary
+
+# Set in every pool process by init_worker
+STOP_WORDS: Tuple[str, ...] = ()
+IMAGES_DIR: Optional[str] = None
+MODERATE: bool = True
+
+
+# Record fields that must be strings when present
+STRING_FIELDS: Tuple[str, ...] = ('author', 'text', 'group', 'pub_date',
+                                  'image')
+# Rows per UPDATE restoring pub_date, within SQLite's 999 parameters
+PUB_DATE_CHUNK: int = 300
+
+
+class Prepared(NamedTuple):
+    """What a pool process found out about one record."""
+    status: str
+    image: str = ''
+    image_size: int = 0
+    image_width: Optional[int] = None
+    image_height: Optional[int] = None
+    image_placeholder: str = ''
+    warning: str = ''
+
+
+def init_worker(stop_words: Tuple[str, ...], images_dir: Optional[str],
+                moderate: bool) -> None:
+    global STOP_WORDS, IMAGES_DIR, MODERATE
+    STOP_WORDS, IMAGES_DIR, MODERATE = stop_words, images_dir, moderate
+
+
+def stage_image(images_dir: str, path: str) -> str:
+    """Copy a local image to the post image storage, not referenced yet."""
+    with open(safe_join(images_dir, path), 'rb') as file:
+        return Post.image.field.storage.stage(
+            Post.image.field.generate_filename(None, os.path.basename(path)),
+            File(file),
+        )
+
+
+def store_image(path: str) -> Prepared:
+    """
+    Stage a local image and describe it.
+
+    The parent takes the reference in the batch transaction, so a batch
+    that is rolled back leaves no references to count twice on rerun.
+    """
+    storage = Post.image.field.storage
+    try:
+        name = stage_image(IMAGES_DIR, path)
+        with storage.open(name) as file:
+            width, height, placeholder = describe_image(file)
+        size = storage.size(name)
+    except (OSError, SuspiciousFileOperation) as error:
+        return Prepared(Post.PUBLISHED, warning=f'image {path}: {error}')
+
+    return Prepared(
+        Post.PUBLISHED, name, size, width, height, placeholder
+    )
+
+
+def prepare_record(record: dict) -> Prepared:
+    """Moderate the text and store the image of one record."""
+    prepared = Prepared(Post.PUBLISHED)
+    if record.get('image'):
+        if IMAGES_DIR is None:
+            prepared = prepared._replace(
+                warning=f'image {record["image"]}: no --images-dir'
+            )
+        else:
+            prepared = store_image(record['image'])
+
+    if MODERATE:
+        _, has_bad_words = bad_language_validation(
+            record['text'], STOP_WORDS, SIMILARITY_THRESHOLD
+        )
+        if has_bad_words:
+            prepared = prepared._replace(status=Post.REJECTED)
+
+    return prepared
+
+
+class Command(BaseCommand):
+    help = (
+        'Import posts from a JSONL file, one {"author", "text", "group", '
+        '"pub_date", "image"} object per line. Missing authors and groups '
+        'are created, images are taken from --images-dir.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSONL file to import.')
+        parser.add_argument(
+            '--images-dir',
+            help='Directory the "image" paths of records are relative to.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Processes moderating texts and storing images '
+                 '(default: CPU count, 0 to do it in this process).',
+        )
+        parser.add_argument(
+            '--chunksize',
+            type=int,
+            default=64,
+            help='Records sent to a pool process at once.',
+        )
+        parser.add_argument(
+            '--skip-moderation',
+            action='store_true',
+            help='Trust the source and publish every post.',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the checkpoint and import from the first line.',
+        )
+
+    def handle(self, *args, **options):
+        path = os.path.realpath(options['path'])
+        if not os.path.isfile(path):
+            raise CommandError(f'No such file: {options["path"]}')
+
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=path)
+        if options['restart']:
+            checkpoint.line = 0
+        if checkpoint.line:
+            self.stdout.write(f'Resuming after line {checkpoint.line}')
+
+        moderate = not options['skip_moderation']
+        stop_words = ()
+        if moderate:
+            # Loaded before the fork, the pool shares the dictionaries.
+            build_moderation_dictionary()
+            stop_words = tuple(
+                CensoredWord.objects.values_list('word', flat=True)
+            )
+        initargs = (stop_words, options['images_dir'], moderate)
+
+        self.images_dir = options['images_dir']
+        self.authors: Dict[str, int] = {}
+        self.groups: Dict[str, int] = {}
+        self.imported = self.skipped = 0
+        self.start = time.monotonic()
+
+        with open(path, encoding='utf-8') as file:
+            lines = islice(enumerate(file, 1), checkpoint.line, None)
+            batches = chunked(self.records(lines), options['batch_size'])
+
+            if options['workers']:
+                # Forked children must open their own connections.
+                connections.close_all()
+                with ProcessPoolExecutor(
+                    options['workers'],
+                    mp_context=multiprocessing.get_context('fork'),
+                    initializer=init_worker,
+                    initargs=initargs,
+                ) as executor:
+                    self.import_batches(batches, checkpoint, partial(
+                        executor.map, chunksize=options['chunksize']
+                    ))
+            else:
+                init_worker(*initargs)
+                self.import_batches(batches, checkpoint, map)
+
+        elapsed = time.monotonic() - self.start
+        self.stdout.write(self.style.SUCCESS(
+            f'{self.imported} posts in {elapsed:.1f}s '
+            f'({self.imported / max(elapsed, 1e-6):.0f} rows/s), '
+            f'{self.skipped} lines skipped'
+        ))
+        self.stdout.write(
+            'Run `manage.py pregenerate_thumbnails` for the new images.'
+        )
+
+    def records(self, lines: Iterable[Tuple[int, str]]) -> Iterator:
+        """(line number, record) of valid lines, warnings for the rest."""
+        for number, line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError('not a JSON object')
+                for field in STRING_FIELDS:
+                    if (record.get(field) is not None
+                            and not isinstance(record[field], str)):
+                        raise ValueError(f'"{field}" must be a string')
+                if not record.get('author') or not record.get('text'):
+                    raise ValueError('"author" and "text" are required')
+            except ValueError as error:
+                self.warn(number, error)
+                continue
+            yield number, record
+
+    def warn(self, number: int, message) -> None:
+        self.skipped += 1
+        self.stderr.write(f'Line {number}: {message}')
+
+    def import_batches(self, batches, checkpoint: ImportCheckpoint,
+                       map_records) -> None:
+        for batch in batches:
+            numbers = [number for number, _ in batch]
+            records = [record for _, record in batch]
+            prepared = list(map_records(prepare_record, records))
+
+            with transaction.atomic():
+                authors = self.resolve(
+                    self.authors, User, 'username',
+                    {record['author'] for record in records},
+                )
+                groups = self.resolve(
+                    self.groups, Group, 'slug',
+                    {record['group'] for record in records
+                     if record.get('group')},
+                )
+                posts = [
+                    self.make_post(number, record, result, authors, groups)
+                    for number, record, result
+                    in zip(numbers, records, prepared)
+                ]
+                # bulk_create sets auto_now_add pub_date to now().
+                pub_dates = [post.pub_date for post in posts]
+                Post.objects.bulk_create(posts)
+                self.restore_pub_dates(posts, pub_dates)
+
+                checkpoint.line = numbers[-1]
+                checkpoint.save()
+
+            self.imported += len(posts)
+            rate = self.imported / max(time.monotonic() - self.start, 1e-6)
+            self.stdout.write(
+                f'Post: {self.imported} (line {checkpoint.line}, '
+                f'{rate:.0f} rows/s)',
+                ending='\r',
+            )
+
+    def make_post(self, number: int, record: dict, prepared: Prepared,
+                  authors: Dict[str, int], groups: Dict[str, int]) -> Post:
+        if prepared.warning:
+            self.stderr.write(f'Line {number}: {prepared.warning}')
+        if prepared.image:
+            self.reference_image(record['image'], prepared)
+
+        pub_date = None
+        if record.get('pub_date'):
+            pub_date = parse_datetime(record['pub_date'])
+            if pub_date is None:
+                self.stderr.write(
+                    f'Line {number}: bad pub_date {record["pub_date"]}'
+                )
+            elif timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+
+        return Post(
+            text=record['text'],
+            author_id=authors[record['author']],
+            group_id=groups.get(record.get('group')),
+            pub_date=pub_date,
+            status=prepared.status,
+            image=prepared.image,
+            image_width=prepared.image_width,
+            image_height=prepared.image_height,
+            image_placeholder=prepared.image_placeholder,
+        )
+
+    def reference_image(self, path: str, prepared: Prepared) -> None:
+        """Count the reference of a new post to its staged image."""
+        storage = Post.image.field.storage
+        storage.reference(prepared.image, prepared.image_size)
+        if not storage.exists(prepared.image):
+            # The last post with the same image was deleted meanwhile;
+            # the reference is held now, so the copy stays.
+            stage_image(self.images_dir, path)
+
+    def restore_pub_dates(self, posts: List[Post],
+                          pub_dates: List[Optional[dt.datetime]]) -> None:
+        """Set pub_date of the source on the posts that had one."""
+        if posts and posts[0].pk is None:
+            # Only PostgreSQL returns keys from bulk_create. On SQLite the
+            # batch transaction keeps other writers out, so the batch
+            # is the newest rows.
+            keys = Post.objects.order_by('-pk').values_list('pk', flat=True)
+            for post, pk in zip(posts, sorted(keys[:len(posts)])):
+                post.pk = pk
+
+        dated = [
+            (post.pk, pub_date)
+            for post, pub_date in zip(posts, pub_dates) if pub_date
+        ]
+        for chunk in chunked(dated, PUB_DATE_CHUNK):
+            Post.objects.filter(pk__in=[pk for pk, _ in chunk]).update(
+                pub_date=Case(
+                    *(When(pk=pk, then=Value(pub_date))
+                      for pk, pub_date in chunk),
+                    output_field=DateTimeField(),
+                )
+            )
+
+    def resolve(self, cache: Dict[str, int], model, field: str,
+                keys: Iterable[str]) -> Dict[str, int]:
+        """
+        Primary keys of rows by a unique field, created when missing.
+
+        One query per batch for keys not seen yet, and one more to find
+        the keys of rows created now: bulk_create returns none on SQLite.
+        """
+        missing = [key for key in keys if key not in cache]
+        if missing:
+            cache.update(model.objects.filter(
+                **{f'{field}__in': missing}
+            ).values_list(field, 'pk'))
+
+            new: List = [
+                self.new_row(model, key) for key in missing
+                if key not in cache
+            ]
+            if new:
+                model.objects.bulk_create(new)
+                cache.update(model.objects.filter(
+                    **{f'{field}__in': [getattr(row, field) for row in new]}
+                ).values_list(field, 'pk'))
+
+        return cache
+
+    def new_row(self, model, key: str):
+        if model is User:
+            # Imported authors log in after a password reset.
+            return User(username=key, password=make_password(None))
+        return Group(slug=key, title=key, description='')
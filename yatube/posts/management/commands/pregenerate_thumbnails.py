@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from sorl.thumbnail.images import ImageFile
+
+from posts.models import Post
+from posts.thumbnails import (describe_image, generate_thumbnails,
+                              record_sources)
+
+
+# Width, height and placeholder of an image
+Description = Tuple[int, int, str]
+
+
+def prepare_image(name: str,
+                  describe: bool) -> Tuple[Optional[Description], str]:
+    """
+    Generate thumbnails, map ones made before to the image, and
+    describe the image if asked to.
+
+    Returns the description and an error message: one broken image is
+    reported, it does not stop the run.
+    """
+    try:
+        # Keys and names of thumbnails depend on the source storage.
+        image = ImageFile(name, Post.image.field.storage)
+        generate_thumbnails(image)
+        record_sources(image)
+        if not describe:
+            return None, ''
+        with Post.image.field.storage.open(name) as file:
+            return describe_image(file), ''
+    except Exception as error:
+        return None, f'{type(error).__name__}: {error}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate missing thumbnails of all post images, and dimensions '
+        'and placeholders of images uploaded before they were stored.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Processes resizing images (default: CPU count).',
+        )
+        parser.add_argument('--chunksize', type=int, default=16)
+
+    def handle(self, *args, **options):
+        # Seeded and imported posts often share image files.
+        names = list(
+            Post.objects.exclude(image='')
+            .order_by()
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        undescribed = set(
+            Post.objects.exclude(image='')
+            .filter(image_placeholder='')
+            .values_list('image', flat=True)
+        )
+        # Forked children must open their own connections.
+        connections.close_all()
+        start = time.perf_counter()
+        done = failed = 0
+        descriptions = {}
+
+        with ProcessPoolExecutor(
+            options['workers'],
+            mp_context=multiprocessing.get_context('fork'),
+        ) as executor:
+            results = executor.map(
+                prepare_image,
+                names,
+                [name in undescribed for name in names],
+                chunksize=options['chunksize'],
+            )
+            for name, (description, error) in zip(names, results):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                if description:
+                    descriptions[name] = description
+                done += 1
+                if done % 100 == 0:
+                    self.stdout.write(f'{done}/{len(names)} images')
+
+        for name, (width, height, placeholder) in descriptions.items():
+            Post.objects.filter(image=name).update(
+                image_width=width,
+                image_height=height,
+                image_placeholder=placeholder,
+            )
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(names)} images in {elapsed:.1f}s '
+            f'({len(names) / max(elapsed, 1e-9):.0f} images/s), '
+            f'{failed} failed'
+        ))
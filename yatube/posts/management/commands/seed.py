@@ -0,0 +1,216 @@
+import io
+import random
+import time
+from itertools import accumulate
+from typing import Iterable, List
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from faker import Faker
+from PIL import Image
+
+from posts.models import CensoredWord, Comment, Follow, Group, Post, User
+from posts.utils import chunked
+
+SEED_PASSWORD: str = 'seed-password'
+TEXT_POOL_SIZE: int = 1000
+FOLLOW_SKEW: float = 1.2
+GROUP_SHARE: float = 0.7
+IMAGE_SHARE: float = 0.1
+IMAGE_POOL_SIZE: int = 20
+IMAGE_SIZE = (960, 339)
+IMAGE_FOLDER: str = 'posts/seed/'
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with synthetic users, groups, posts and more.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--words', type=int, default=100)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed, the same seed gives the same data.',
+        )
+        parser.add_argument(
+            '--images',
+            action='store_true',
+            help=f'Attach dummy images to {IMAGE_SHARE:.0%}% of posts.',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        self.texts = [
+            self.fake.paragraph(nb_sentences=3)
+            for _ in range(TEXT_POOL_SIZE)
+        ]
+
+        user_ids = self.seed_users(options['users'])
+        group_ids = self.seed_groups(options['groups'])
+        images = self.seed_images() if options['images'] else []
+        post_ids = self.seed_posts(
+            options['posts'], user_ids, group_ids, images
+        )
+        self.seed_comments(options['comments'], user_ids, post_ids)
+        self.seed_follows(options['follows'], user_ids)
+        self.seed_words(options['words'])
+
+    def bulk_create(self, model, objects: Iterable, total: int) -> None:
+        """Insert objects in batches and report progress."""
+        name = model.__name__
+        created = 0
+        start = time.monotonic()
+
+        for batch in chunked(objects, self.batch_size):
+            model.objects.bulk_create(batch)
+            created += len(batch)
+            rate = created / max(time.monotonic() - start, 1e-6)
+            self.stdout.write(
+                f'{name}: {created}/{total} ({rate:.0f} rows/s)',
+                ending='\r',
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{name}: {created} in {time.monotonic() - start:.1f}s'
+            )
+        )
+
+    def last_id(self, model) -> int:
+        return model.objects.aggregate(Max('pk'))['pk__max'] or 0
+
+    def new_ids(self, model, last_id: int) -> range:
+        """
+        Primary keys of rows inserted after last_id.
+
+        bulk_create returns no keys on SQLite, but a single insert run
+        gets a contiguous block of them.
+        """
+        ids = model.objects.filter(pk__gt=last_id).aggregate(
+            first=Min('pk'), last=Max('pk')
+        )
+        if ids['first'] is None:
+            return range(0)
+        return range(ids['first'], ids['last'] + 1)
+
+    def seed_users(self, total: int) -> range:
+        last_id = self.last_id(User)
+        # Hashing is slow, every seeded user shares the same password.
+        password = make_password(SEED_PASSWORD)
+        users = (
+            User(
+                username=f'{self.fake.user_name()}_{last_id + i}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                password=password,
+            )
+            for i in range(total)
+        )
+        self.bulk_create(User, users, total)
+        return self.new_ids(User, last_id)
+
+    def seed_groups(self, total: int) -> range:
+        last_id = self.last_id(Group)
+        groups = (
+            Group(
+                title=self.fake.sentence(nb_words=3)[:200],
+                slug=f'group-{last_id + i}',
+                description=self.rng.choice(self.texts),
+            )
+            for i in range(total)
+        )
+        self.bulk_create(Group, groups, total)
+        return self.new_ids(Group, last_id)
+
+    def seed_images(self) -> List[str]:
+        """Save a small pool of dummy images shared by seeded posts."""
+        names: List[str] = []
+
+        for i in range(IMAGE_POOL_SIZE):
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', IMAGE_SIZE, color).save(buffer, 'JPEG')
+            names.append(
+                default_storage.save(
+                    f'{IMAGE_FOLDER}seed_{i}.jpg',
+                    ContentFile(buffer.getvalue()),
+                )
+            )
+
+        return names
+
+    def seed_posts(self, total: int, user_ids: range, group_ids: range,
+                   images: List[str]) -> range:
+        last_id = self.last_id(Post)
+        rng = self.rng
+        posts = (
+            Post(
+                text=rng.choice(self.texts),
+                author_id=rng.choice(user_ids),
+                group_id=(
+                    rng.choice(group_ids)
+                    if rng.random() < GROUP_SHARE else None
+                ),
+                image=(
+                    rng.choice(images)
+                    if images and rng.random() < IMAGE_SHARE else ''
+                ),
+            )
+            for _ in range(total)
+        )
+        self.bulk_create(Post, posts, total)
+        return self.new_ids(Post, last_id)
+
+    def seed_comments(self, total: int, user_ids: range,
+                      post_ids: range) -> None:
+        rng = self.rng
+        comments = (
+            Comment(
+                post_id=rng.choice(post_ids),
+                author_id=rng.choice(user_ids),
+                text=rng.choice(self.texts),
+            )
+            for _ in range(total)
+        )
+        self.bulk_create(Comment, comments, total)
+
+    def seed_follows(self, total: int, user_ids: range) -> None:
+        """Follow authors with a Zipf-like skew: few have most followers."""
+        rng = self.rng
+        authors = list(user_ids)
+        rng.shuffle(authors)
+        cum_weights = list(accumulate(
+            1 / (rank + 1) ** FOLLOW_SKEW for rank in range(len(authors))
+        ))
+        total = min(total, len(authors) * (len(authors) - 1))
+
+        def follows():
+            pairs = set()
+            while len(pairs) < total:
+                user_id = rng.choice(user_ids)
+                author_id = rng.choices(authors, cum_weights=cum_weights)[0]
+                if user_id == author_id or (user_id, author_id) in pairs:
+                    continue
+                pairs.add((user_id, author_id))
+                yield Follow(user_id=user_id, author_id=author_id)
+
+        self.bulk_create(Follow, follows(), total)
+
+    def seed_words(self, total: int) -> None:
+        words = (
+            CensoredWord(word=self.fake.word()[:50]) for _ in range(total)
+        )
+        self.bulk_create(CensoredWord, words, total)
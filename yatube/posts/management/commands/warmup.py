@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        'Compile templates, build the moderation dictionary and pre-render '
+        'first feed pages. Caches are per process unless CACHES is shared.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=settings.WARM_UP_PAGES
+        )
+        parser.add_argument(
+            '--groups', type=int, default=settings.WARM_UP_GROUPS
+        )
+
+    def handle(self, *args, **options):
+        timings = warm_up(options['pages'], options['groups'])
+
+        for name, seconds in timings.items():
+            self.stdout.write(f'{name}: {seconds * 1000:.0f}ms')
@@ -0,0 +1,43 @@
+from typing import Optional
+
+from sorl.thumbnail.conf import settings as sorl_settings
+
+from core.storage import HashedFileSystemStorage
+
+from .models import Post
+from .thumbnails import thumbnail_source
+
+YEAR: int = 365 * 24 * 60 * 60
+# Files under legacy, not content-addressed names may be replaced
+MAX_AGE: int = 60 * 60
+IMMUTABLE = {'public': True, 'max_age': YEAR, 'immutable': True}
+
+
+def media_access(request, name: str) -> Optional[dict]:
+    """
+    Cache-Control directives of a media file, None to hide it.
+
+    A post image is public while a published post uses it, and
+    otherwise visible to the authors of the posts only. A thumbnail
+    follows its source image: its name hashes the source name and
+    options, so it is immutable only if the source name is hashed.
+    """
+    if name.startswith(sorl_settings.THUMBNAIL_PREFIX):
+        name = thumbnail_source(name)
+        if name is None:
+            return None
+
+    if not name.startswith(Post.image.field.upload_to):
+        return None
+
+    posts = Post.objects.filter(image=name)
+    if posts.published().exists():
+        if HashedFileSystemStorage.is_hashed(name):
+            return IMMUTABLE
+        return {'public': True, 'max_age': MAX_AGE}
+
+    if (request.user.is_authenticated
+            and posts.filter(author=request.user).exists()):
+        return {'private': True, 'max_age': MAX_AGE}
+
+    return None
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_auto_20230321_1827'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='status',
+            field=models.CharField(choices=[('published', 'Опубликован'), ('pending', 'На модерации'), ('rejected', 'Отклонён')], default='published', max_length=10, verbose_name='Статус модерации'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', '-pub_date'], name='posts_post_feed_idx'),
+        ),
+    ]
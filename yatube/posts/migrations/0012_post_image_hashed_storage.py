@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:16
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_stored_file'),
+        ('posts', '0011_post_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=core.storage.HashedFileSystemStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True, verbose_name='Источник')),
+                ('line', models.PositiveIntegerField(default=0, verbose_name='Импортировано строк')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Точка импорта',
+                'verbose_name_plural': 'Точки импорта',
+            },
+        ),
+    ]
@@ -1,10 +1,23 @@
+from typing import Dict, Tuple
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.storage import HashedFileSystemStorage
+
 User = get_user_model()
 PUB_DATE_DESC: str = '-pub_date'
 COMM_DATE_DESC: str = '-created'
 POST_TEXT_LIMIT: int = 15
+# Columns of the post and its relations shown by includes/post.html
+FEED_FIELDS: Tuple[str, ...] = (
+    'text', 'pub_date', 'status', 'image', 'image_width', 'image_height',
+    'image_placeholder', 'author', 'group',
+)
+FEED_RELATION_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'author': ('username', 'first_name', 'last_name'),
+    'group': ('slug',),
+}
 
 
 class Group(models.Model):
@@ -23,10 +36,43 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def published(self):
+        """Posts that passed moderation, the only ones shown in feeds."""
+        return self.filter(status=Post.PUBLISHED)
+
+    def for_feed(self, *relations: str):
+        """
+        Posts with only the columns feed cards show, relations joined.
+
+        Relations the queryset already knows, like the group of
+        group.posts_group, are better left out. A card reading any other
+        column would load it with a query of its own.
+        """
+        relations = relations or tuple(FEED_RELATION_FIELDS)
+        return self.select_related(*relations).only(
+            *FEED_FIELDS,
+            *(
+                f'{relation}__{field}'
+                for relation in relations
+                for field in FEED_RELATION_FIELDS[relation]
+            ),
+        )
+
+
 class Post(models.Model):
     """
     Post model is responsible for the post.
     """
+    PUBLISHED = 'published'
+    PENDING = 'pending'
+    REJECTED = 'rejected'
+    STATUSES = (
+        (PUBLISHED, 'Опубликован'),
+        (PENDING, 'На модерации'),
+        (REJECTED, 'Отклонён'),
+    )
+
     text = models.TextField(
         'Текст',
         help_text='Введите текст поста'
@@ -56,11 +102,48 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=HashedFileSystemStorage(),
         blank=True
     )
+    # Filled from the file on upload, see posts.signals.describe_post_image
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    image_placeholder = models.CharField(
+        'Заглушка картинки',
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text='Картинка в несколько пикселей в виде data URI',
+    )
+
+    status = models.CharField(
+        'Статус модерации',
+        max_length=10,
+        choices=STATUSES,
+        default=PUBLISHED,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = (PUB_DATE_DESC,)
+        indexes = (
+            # Feeds: published posts, newest first
+            models.Index(
+                fields=('status', PUB_DATE_DESC),
+                name='posts_post_feed_idx',
+            ),
+        )
         verbose_name = 'Публикация'
         verbose_name_plural = 'Публикации'
 
@@ -132,3 +215,17 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.user.username} -> {self.author.username}'
+
+
+class ImportCheckpoint(models.Model):
+    """Lines of a source file already imported by `manage.py import_posts`."""
+    source = models.CharField('Источник', max_length=255, unique=True)
+    line = models.PositiveIntegerField('Импортировано строк', default=0)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Точка импорта'
+        verbose_name_plural = 'Точки импорта'
+
+    def __str__(self):
+        return f'{self.source}: {self.line}'
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from core.uploads import BROKEN_IMAGE_ERRORS
+
+from .models import Post
+from .tasks import make_thumbnail
+from .thumbnails import describe_image, generate_thumbnails
+
+
+@receiver(pre_save, sender=Post)
+def describe_post_image(sender, instance, raw, **kwargs):
+    """Store dimensions and placeholder of a newly uploaded image."""
+    if raw:
+        return
+
+    if not instance.image:
+        instance.image_width = instance.image_height = None
+        instance.image_placeholder = ''
+        return
+
+    # Only a fresh upload is not committed to the storage yet; existing
+    # images are described by `manage.py pregenerate_thumbnails`.
+    if instance.image._committed:
+        return
+
+    try:
+        (
+            instance.image_width,
+            instance.image_height,
+            instance.image_placeholder,
+        ) = describe_image(instance.image)
+    except BROKEN_IMAGE_ERRORS:
+        # Not decodable: saved as it is, the fields stay empty.
+        instance.image_width = instance.image_height = None
+        instance.image_placeholder = ''
+
+
+@receiver(post_init, sender=Post)
+def remember_image(sender, instance, **kwargs):
+    """Image name as loaded, None if deferred: saves compare with it."""
+    image = instance.__dict__.get('image')
+    instance.loaded_image = getattr(image, 'name', image)
+
+
+@receiver(post_save, sender=Post)
+def queue_thumbnails(sender, instance, created, raw, update_fields,
+                     **kwargs):
+    """
+    Generate thumbnails of a new post image, in a worker by default.
+
+    Edits of the text or status keep the image and queue nothing.
+    """
+    if raw or 'image' not in instance.__dict__:
+        # A deferred image is not saved, so it has not changed.
+        return
+    if update_fields is not None and 'image' not in update_fields:
+        return
+
+    name = instance.image.name
+    changed = created or name != instance.loaded_image
+    instance.loaded_image = name
+    if not name or not changed:
+        return
+
+    if settings.THUMBNAILS_EAGER:
+        generate_thumbnails(instance.image)
+    else:
+        make_thumbnail.enqueue(post_id=instance.pk)
+
+
+def release_image(storage, name: str) -> None:
+    """Drop a reference to the image file, and its thumbnails with the last."""
+    storage.delete(name)
+    if not storage.exists(name):
+        delete_thumbnails(ImageFile(name, storage), delete_file=False)
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    if instance.image:
+        release_image(instance.image.storage, instance.image.name)
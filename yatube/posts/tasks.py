@@ -0,0 +1,37 @@
+from jobs.models import PRIORITY_LOW
+from jobs.queue import task
+
+from .forms import SIMILARITY_THRESHOLD
+from .models import CensoredWord, Post
+from .thumbnails import generate_thumbnails
+from .utils import bad_language_validation
+
+
+@task('posts.make_thumbnail', priority=PRIORITY_LOW)
+def make_thumbnail(post_id: int) -> None:
+    """Generate post thumbnails before the first page render needs them."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+
+    generate_thumbnails(post.image)
+
+
+@task('posts.moderate_post')
+def moderate_post(post_id: int) -> None:
+    """Publish a pending post or reject it if it has censored words."""
+    post = Post.objects.filter(pk=post_id, status=Post.PENDING).first()
+    if post is None:
+        return
+
+    stop_words = CensoredWord.objects.values_list('word', flat=True)
+    _, has_bad_words = bad_language_validation(
+        post.text, stop_words, SIMILARITY_THRESHOLD
+    )
+    status = Post.REJECTED if has_bad_words else Post.PUBLISHED
+
+    # The author may have edited the post meanwhile, that edit has its
+    # own job, so only the text checked here is updated.
+    Post.objects.filter(
+        pk=post_id, status=Post.PENDING, text=post.text
+    ).update(status=status)
@@ -0,0 +1,272 @@
+import base64
+import json
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post
+from ..thumbnails import generate_thumbnails
+from .utils import TEST_GIF
+
+User = get_user_model()
+NUMBER_OF_POSTS: int = 25
+PAGE_LIMIT: int = 10
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+
+        cls.user = User.objects.create(username='HasNoName')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+        cls.follower = User.objects.create(username='Follower')
+        cls.follower_client = Client()
+        cls.follower_client.force_login(cls.follower)
+        Follow.objects.create(user=cls.follower, author=cls.user)
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='some-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+            for i in range(NUMBER_OF_POSTS)
+        )
+        # Same pub_date everywhere: pages must still not overlap.
+        Post.objects.update(pub_date=timezone.now())
+        cls.post = Post.objects.order_by('-pk').first()
+        cls.pending = Post.objects.create(
+            text='На модерации', author=cls.user, status=Post.PENDING
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.follower, text='Комментарий'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get(self, name: str, args=(), client=None, **params):
+        return (client or self.guest_client).get(
+            reverse(f'posts:{name}', args=args), params
+        )
+
+    def test_keyset_pages(self):
+        """Pages follow each other without gaps or repeats."""
+        ids = []
+        params = {'limit': PAGE_LIMIT}
+        while True:
+            page = self.get('api_posts', **params).json()
+            ids += [post['id'] for post in page['results']]
+            if not page['next']:
+                break
+            params['cursor'] = page['next']
+
+        self.assertEqual(
+            ids,
+            list(Post.objects.published().order_by('-pub_date', '-pk')
+                 .values_list('pk', flat=True)),
+        )
+
+    def test_post_fields(self):
+        """Posts are plain dicts with author and group by name."""
+        post = self.get('api_posts', limit=1).json()['results'][0]
+
+        self.assertEqual(post['id'], self.post.pk)
+        self.assertEqual(post['author'], self.user.username)
+        self.assertEqual(post['group'], self.group.slug)
+        self.assertIsNone(post['image'])
+        self.assertIsNone(post['thumbnail'])
+
+    def test_field_selection(self):
+        """Only the selected fields are returned."""
+        response = self.get('api_posts', fields='id,text')
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'text'}
+        )
+
+        response = self.get(
+            'api_profile', args=[self.user.username], fields='posts'
+        )
+        self.assertEqual(response.json(), {'posts': NUMBER_OF_POSTS})
+
+    def test_bad_parameters(self):
+        """Unknown fields and broken cursors are rejected."""
+        cases = (
+            {'fields': 'id,password'},
+            {'cursor': 'garbage'},
+            {'limit': 'many'},
+        )
+        for params in cases:
+            with self.subTest(params=params):
+                response = self.get('api_posts', **params)
+                self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+                self.assertIn('detail', response.json())
+
+    def test_tampered_cursor(self):
+        """Cursors with values of wrong types are rejected."""
+        cases = (
+            ('api_posts', ['x', 'y']),
+            ('api_posts', ['2020-01-01T00:00:00', 'zz']),
+            ('api_posts', [None, 1]),
+            ('api_posts', [[], {}]),
+            ('api_groups', ['a']),
+            ('api_groups', [1, 2]),
+        )
+        for name, values in cases:
+            with self.subTest(name=name, values=values):
+                cursor = base64.urlsafe_b64encode(
+                    json.dumps(values).encode()
+                ).decode()
+                response = self.get(name, cursor=cursor)
+                self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+                self.assertEqual(response.json(), {'detail': 'Bad cursor'})
+
+    def test_one_query_per_page(self):
+        """A page of posts is one query, a repeated one comes from cache."""
+        with self.assertNumQueries(1):
+            self.get('api_posts')
+        with self.assertNumQueries(0):
+            self.get('api_posts')
+
+    def test_conditional_get(self):
+        """Unchanged response is answered with 304."""
+        etag = self.get('api_groups')['ETag']
+
+        response = self.guest_client.get(
+            reverse('posts:api_groups'), HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_unpublished_post(self):
+        """Pending post is hidden from everyone but its author."""
+        ids = [post['id'] for post in self.get(
+            'api_posts', limit=100
+        ).json()['results']]
+        self.assertNotIn(self.pending.pk, ids)
+
+        response = self.get('api_post', args=[self.pending.pk])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+        response = self.get(
+            'api_post', args=[self.pending.pk], client=self.authorized_client
+        )
+        self.assertEqual(response.json()['status'], Post.PENDING)
+
+    def test_endpoints(self):
+        """Groups, profiles, comments and filtered feeds."""
+        group = self.get('api_group', args=[self.group.slug]).json()
+        self.assertEqual(group['title'], self.group.title)
+
+        groups = self.get('api_groups').json()['results']
+        self.assertEqual([group['slug'] for group in groups], ['some-slug'])
+
+        profile = self.get('api_profile', args=[self.user.username]).json()
+        self.assertEqual(profile['posts'], NUMBER_OF_POSTS)
+        self.assertEqual(profile['followers'], 1)
+        self.assertEqual(profile['following'], 0)
+
+        comments = self.get('api_comments', args=[self.post.pk]).json()
+        self.assertEqual(comments['results'][0]['text'], 'Комментарий')
+
+        posts = self.get('api_posts', author='Follower').json()
+        self.assertEqual(posts['results'], [])
+
+    def test_follow_feed(self):
+        """Follow feed needs a user and has the followed authors' posts."""
+        response = self.get('api_follow')
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+        page = self.get(
+            'api_follow', client=self.follower_client, limit=100
+        ).json()
+        self.assertEqual(len(page['results']), NUMBER_OF_POSTS)
+
+    def test_image_and_thumbnail(self):
+        """Post image has its URL, placeholder and feed thumbnail."""
+        post = Post.objects.create(
+            text='С картинкой',
+            author=self.user,
+            image=SimpleUploadedFile('small.gif', TEST_GIF),
+        )
+        generate_thumbnails(post.image)
+
+        result = self.get('api_post', args=[post.pk]).json()
+
+        self.assertEqual(result['image'], post.image.url)
+        self.assertEqual(result['image_placeholder'], post.image_placeholder)
+        self.assertIn('webp_srcset', result['thumbnail'])
+
+    def test_batch(self):
+        """Posts come in the order of ids, hidden and unknown are missing."""
+        first = Post.objects.order_by('pk').first()
+        ids = [self.post.pk, self.pending.pk, first.pk, 0]
+
+        with self.assertNumQueries(1):
+            response = self.get(
+                'api_batch', ids=','.join(map(str, ids)), fields='id,author'
+            )
+
+        self.assertEqual(response.json(), {
+            'results': [
+                {'id': self.post.pk, 'author': self.user.username},
+                {'id': first.pk, 'author': self.user.username},
+            ],
+            'missing': [self.pending.pk, 0],
+        })
+
+        response = self.get(
+            'api_batch',
+            ids=str(self.pending.pk),
+            client=self.authorized_client,
+        )
+        self.assertEqual(response.json()['results'][0]['group'], None)
+
+    def test_batch_cards(self):
+        """Cards are cached until anything they show changes."""
+        params = {'ids': str(self.post.pk), 'format': 'cards'}
+        card = self.get('api_batch', **params).json()['results'][0]
+        self.assertIn(self.post.text, card['html'])
+        self.assertNotIn('<hr>', card['html'])
+
+        with self.assertTemplateNotUsed('includes/post.html'):
+            self.get('api_batch', **params)
+
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        card = self.get('api_batch', **params).json()['results'][0]
+        self.assertIn('Новый текст', card['html'])
+
+    def test_batch_bad_parameters(self):
+        """Missing, broken or too many ids are rejected."""
+        cases = (
+            {},
+            {'ids': '1,two'},
+            {'ids': ','.join(map(str, range(1, 102)))},
+            {'ids': '1', 'format': 'xml'},
+        )
+        for params in cases:
+            with self.subTest(params=params):
+                response = self.get('api_batch', **params)
+                self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
@@ -0,0 +1,294 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import StoredFile
+
+from ..models import (CensoredWord, Comment, Follow, Group, ImportCheckpoint,
+                      Post)
+from ..warmup import prerender_feeds
+from .utils import TEST_GIF
+
+User = get_user_model()
+IMPORT_POSTS: str = 'posts.management.commands.import_posts'
+
+
+class SeedCommandTests(TestCase):
+    def seed(self, seed: int = 1) -> None:
+        call_command(
+            'seed',
+            users=20,
+            groups=3,
+            posts=120,
+            comments=50,
+            follows=40,
+            words=5,
+            batch_size=32,
+            seed=seed,
+            stdout=StringIO(),
+        )
+
+    def test_seed_creates_requested_rows(self):
+        """Seed command creates the requested number of rows."""
+        self.seed()
+
+        expected_counts = {
+            Group: 3,
+            Post: 120,
+            Comment: 50,
+            Follow: 40,
+            CensoredWord: 5,
+        }
+
+        for model, expected in expected_counts.items():
+            with self.subTest(model=model):
+                self.assertEqual(model.objects.count(), expected)
+
+        self.assertFalse(
+            Follow.objects.filter(user_id=F('author_id')).exists()
+        )
+
+    def test_seed_is_deterministic(self):
+        """Same seed gives the same content."""
+        self.seed()
+        first = list(
+            Post.objects.order_by('pk').values_list('text', flat=True)
+        )
+        Post.objects.all().delete()
+
+        self.seed()
+        second = list(
+            Post.objects.order_by('pk').values_list('text', flat=True)
+        )
+
+        self.assertEqual(first, second)
+
+
+class WarmupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='some-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(
+            text='Тестовый пост', author=cls.user, group=cls.group
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    @override_settings(ALLOWED_HOSTS=['*', 'yatube.example'])
+    def test_prerender_feeds(self):
+        """First pages of index and groups are cached for the site host."""
+        self.assertEqual(prerender_feeds(pages=2, groups=1), 4)
+
+        with self.assertNumQueries(0):
+            self.client.get(
+                reverse('posts:index'), HTTP_HOST='yatube.example'
+            )
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR))
+class HashMediaTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_hash_media(self):
+        """Legacy images are moved, merged and counted."""
+        user = User.objects.create(username='HasNoName')
+        names = [
+            default_storage.save(f'posts/{name}', ContentFile(b'cat'))
+            for name in ('a.gif', 'b.gif')
+        ]
+        for name in names + names:
+            Post.objects.create(text='Тестовый пост', author=user, image=name)
+
+        call_command('hash_media', stdout=StringIO())
+
+        images = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(images), 1)
+        image = images.pop()
+        self.assertTrue(default_storage.exists(image))
+        self.assertEqual(StoredFile.objects.get(name=image).refs, 4)
+        for name in names:
+            self.assertFalse(default_storage.exists(name))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR))
+class ImportPostsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        self.source = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.source, ignore_errors=True)
+        self.path = os.path.join(self.source, 'posts.jsonl')
+
+    def write(self, records, mode: str = 'w') -> None:
+        with open(self.path, mode, encoding='utf-8') as file:
+            for record in records:
+                line = record if isinstance(record, str) else json.dumps(
+                    record, ensure_ascii=False
+                )
+                file.write(line + '\n')
+
+    def run_import(self, **options) -> str:
+        stdout = StringIO()
+        options.setdefault('skip_moderation', True)
+        call_command(
+            'import_posts',
+            self.path,
+            workers=0,
+            batch_size=2,
+            stdout=stdout,
+            stderr=StringIO(),
+            **options,
+        )
+        return stdout.getvalue()
+
+    def test_import(self):
+        """Posts are imported with new authors, groups and dates."""
+        self.write([
+            {'author': 'leo', 'text': 'Первый', 'group': 'books',
+             'pub_date': '2001-02-03T04:05:06+00:00'},
+            {'author': 'leo', 'text': 'Второй'},
+            {'author': 'anna', 'text': 'Третий', 'group': 'books'},
+        ])
+
+        output = self.run_import()
+
+        self.assertIn('rows/s', output)
+        self.assertEqual(Post.objects.published().count(), 3)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.get().posts_group.count(), 2)
+        post = Post.objects.get(text='Первый')
+        self.assertEqual(post.author.username, 'leo')
+        self.assertEqual(post.pub_date.year, 2001)
+        self.assertEqual(
+            Post.objects.get(text='Второй').pub_date.date(),
+            timezone.now().date(),
+        )
+        self.assertFalse(post.author.has_usable_password())
+
+    def test_resume_from_checkpoint(self):
+        """Second run imports only lines added after the first one."""
+        self.write([{'author': 'leo', 'text': str(i)} for i in range(3)])
+        self.run_import()
+
+        self.write([{'author': 'leo', 'text': str(i)} for i in range(3, 5)],
+                   mode='a')
+        output = self.run_import()
+
+        self.assertIn('Resuming after line 3', output)
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['0', '1', '2', '3', '4'],
+        )
+        self.assertEqual(ImportCheckpoint.objects.get().line, 5)
+
+    def test_bad_lines_are_skipped(self):
+        """Malformed lines and records without text are skipped."""
+        self.write([
+            '{not json',
+            '[1, 2]',
+            {'author': 'leo'},
+            {'author': 1, 'text': 'Пост'},
+            {'author': 'leo', 'text': ['Пост']},
+            {'author': 'leo', 'text': 'Пост', 'group': {'slug': 'books'}},
+            {'author': 'leo', 'text': 'Пост'},
+        ])
+
+        output = self.run_import()
+
+        self.assertIn('6 lines skipped', output)
+        self.assertEqual(Post.objects.get().text, 'Пост')
+
+    def test_local_images(self):
+        """Images come from the local directory, missing ones are skipped."""
+        with open(os.path.join(self.source, 'cat.gif'), 'wb') as file:
+            file.write(TEST_GIF)
+        self.write([
+            {'author': 'leo', 'text': 'С картинкой', 'image': 'cat.gif'},
+            {'author': 'leo', 'text': 'Без картинки', 'image': 'dog.gif'},
+            {'author': 'leo', 'text': 'Снаружи', 'image': '../cat.gif'},
+        ])
+
+        self.run_import(images_dir=self.source)
+
+        post = Post.objects.get(text='С картинкой')
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertTrue(post.image_placeholder)
+        self.assertFalse(Post.objects.exclude(pk=post.pk)
+                         .exclude(image='').exists())
+
+    def test_failed_batch_leaves_no_references(self):
+        """Images of a rolled back batch are referenced once on rerun."""
+        with open(os.path.join(self.source, 'cat.gif'), 'wb') as file:
+            file.write(TEST_GIF)
+        self.write([
+            {'author': 'leo', 'text': str(i), 'image': 'cat.gif'}
+            for i in range(4)
+        ])
+        bulk_create = Post.objects.bulk_create
+        calls = []
+
+        def fail_second_batch(posts, *args, **kwargs):
+            calls.append(posts)
+            if len(calls) == 2:
+                raise DatabaseError('disk full')
+            return bulk_create(posts, *args, **kwargs)
+
+        with mock.patch.object(Post.objects, 'bulk_create',
+                               fail_second_batch):
+            with self.assertRaises(DatabaseError):
+                self.run_import(images_dir=self.source)
+
+        name = Post.objects.values_list('image', flat=True).first()
+        self.assertEqual(StoredFile.objects.get(name=name).refs, 2)
+
+        self.run_import(images_dir=self.source)
+
+        self.assertEqual(Post.objects.filter(image=name).count(), 4)
+        self.assertEqual(StoredFile.objects.get(name=name).refs, 4)
+
+    @mock.patch(f'{IMPORT_POSTS}.build_moderation_dictionary')
+    @mock.patch(f'{IMPORT_POSTS}.bad_language_validation')
+    def test_moderation(self, validation, _):
+        """Posts with censored words are imported as rejected."""
+        validation.side_effect = lambda text, *args: (text, 'плохо' in text)
+        self.write([
+            {'author': 'leo', 'text': 'хорошо'},
+            {'author': 'leo', 'text': 'плохо'},
+        ])
+
+        self.run_import(skip_moderation=False)
+
+        self.assertEqual(
+            Post.objects.get(status=Post.REJECTED).text, 'плохо'
+        )
+        self.assertEqual(Post.objects.published().get().text, 'хорошо')
@@ -0,0 +1,204 @@
+import csv
+import datetime as dt
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import QuerySet
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.routers import set_replica_alias
+
+from ..export import stream_export
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.staff = User.objects.create(username='Staff', is_staff=True)
+        cls.staff_client = Client()
+        cls.staff_client.force_login(cls.staff)
+
+        cls.user = User.objects.create(username='HasNoName')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='some-slug',
+            description='Тестовое описание',
+        )
+        cls.old_post = Post.objects.create(
+            text='Старый пост', author=cls.user, group=cls.group
+        )
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.make_aware(dt.datetime(2020, 1, 15))
+        )
+        cls.post = Post.objects.create(
+            text='Новый пост', author=cls.user, group=cls.group
+        )
+        Post.objects.create(text='Пост без группы', author=cls.staff)
+        Comment.objects.create(
+            post=cls.post, author=cls.staff, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.staff, author=cls.user)
+
+    def export(self, kind: str, **params):
+        response = self.staff_client.get(
+            reverse('posts:export', args=[kind]), params
+        )
+        self.addCleanup(response.close)
+        return response
+
+    def read_jsonl(self, response) -> list:
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_staff_only(self):
+        """Export is not available to guests and regular users."""
+        url = reverse('posts:export', args=['posts'])
+
+        for client in (Client(), self.authorized_client):
+            with self.subTest(client=client):
+                response = client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.FOUND)
+                self.assertIn(reverse('admin:login'), response.url)
+
+    def test_reads_from_replica(self):
+        """Rows come from the replica chosen while the view ran."""
+        aliases = []
+        iterator = QuerySet.iterator
+
+        def recording(queryset, *args, **kwargs):
+            # Rows are read, and the alias resolved, only when streamed.
+            aliases.append(queryset.db)
+            yield from iterator(
+                queryset.using(DEFAULT_DB_ALIAS), *args, **kwargs
+            )
+
+        with mock.patch.object(QuerySet, 'iterator', recording):
+            # As ReplicaRoutingMiddleware does around a streamed response.
+            set_replica_alias('replica')
+            try:
+                chunks = stream_export('posts', 'jsonl')
+            finally:
+                set_replica_alias(None)
+            content = b''.join(chunks).decode()
+
+        self.assertEqual(len(content.splitlines()), Post.objects.count())
+        self.assertEqual(aliases, ['replica'])
+
+    def test_jsonl(self):
+        """Every row is one JSON object, in primary key order."""
+        response = self.export('posts')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('posts.jsonl', response['Content-Disposition'])
+        rows = self.read_jsonl(response)
+        self.assertEqual(
+            [row['id'] for row in rows],
+            list(Post.objects.order_by('pk').values_list('pk', flat=True)),
+        )
+        self.assertEqual(rows[0]['author__username'], self.user.username)
+        self.assertEqual(rows[0]['group__slug'], self.group.slug)
+
+    def test_filters(self):
+        """Rows are filtered by group, author and date range."""
+        cases = (
+            ('posts', {'group': self.group.slug}, 2),
+            ('posts', {'author': self.staff.username}, 1),
+            ('posts', {'since': '2020-01-01', 'until': '2020-02-01'}, 1),
+            ('posts', {'since': '2020-02-01'}, 2),
+            ('comments', {'group': self.group.slug}, 1),
+            ('comments', {'author': self.user.username}, 0),
+            ('follows', {'author': self.user.username}, 1),
+        )
+        for kind, params, expected in cases:
+            with self.subTest(kind=kind, params=params):
+                rows = self.read_jsonl(self.export(kind, **params))
+                self.assertEqual(len(rows), expected)
+
+    def test_bad_request(self):
+        """Unknown kinds, formats, filters and dates are rejected."""
+        cases = (
+            ('users', {}),
+            ('posts', {'format': 'xml'}),
+            ('posts', {'since': 'yesterday'}),
+            ('follows', {'group': self.group.slug}),
+            ('follows', {'since': '2020-01-01'}),
+        )
+        for kind, params in cases:
+            with self.subTest(kind=kind, params=params):
+                response = self.export(kind, **params)
+                self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_csv(self):
+        """CSV has a header row and one row per object."""
+        response = self.export('comments', format='csv')
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(
+            rows[0], ['id', 'post_id', 'author__username', 'text', 'created']
+        )
+        self.assertEqual(rows[1][3], 'Комментарий')
+
+    def test_gzip(self):
+        """gzip=1 streams a gzip file of the same export."""
+        response = self.export('posts', gzip='1')
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('posts.jsonl.gz', response['Content-Disposition'])
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(content.decode().splitlines()), 3)
+
+
+class ExportCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        user = User.objects.create(username='HasNoName')
+        Post.objects.create(text='Тестовый пост', author=user)
+
+    def test_stdout(self):
+        """Export is written to stdout."""
+        stdout = StringIO()
+
+        call_command('export', 'posts', stdout=stdout, stderr=StringIO())
+
+        row = json.loads(stdout.getvalue())
+        self.assertEqual(row['text'], 'Тестовый пост')
+
+    def test_gzip_file(self):
+        """Compressed export is written to --output."""
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'posts.csv.gz')
+
+        call_command(
+            'export', 'posts', output_format='csv', gzip=True, output=path,
+            stderr=StringIO(),
+        )
+
+        with gzip.open(path, 'rt') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(len(rows), 2)
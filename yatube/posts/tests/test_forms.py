@@ -1,6 +1,9 @@
+import hashlib
 import shutil
 import tempfile
 from http import HTTPStatus
+from io import BytesIO
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -8,20 +11,20 @@ from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Comment, Group, Post
+from .utils import TEST_GIF
 
 User = get_user_model()
 ONE_POST: int = 1
 ONE_COMMENT: int = 1
 IMG_FOLDER = Post.image.field.upload_to
-TEST_GIF = (
-    b"\x47\x49\x46\x38\x39\x61\x02\x00"
-    b"\x01\x00\x80\x00\x00\x00\x00\x00"
-    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
-    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
-    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
-    b"\x0A\x00\x3B"
+
+TEST_GIF_HASH = hashlib.sha256(TEST_GIF).hexdigest()
+# Images are stored under their content hash, see core.storage
+TEST_GIF_NAME = (
+    f'{IMG_FOLDER}{TEST_GIF_HASH[:2]}/{TEST_GIF_HASH[2:4]}/{TEST_GIF_HASH}.gif'
 )
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -82,7 +85,7 @@ class PostFormCreateEditTests(TestCase):
 
         self.assertEqual(post_content['text'], post.text)
         self.assertEqual(post_content['group'], post.group.pk)
-        self.assertEqual(post.image, IMG_FOLDER + uploaded_img.name)
+        self.assertEqual(post.image, TEST_GIF_NAME)
         self.assertEqual(self.user, post.author)
         self.assertEqual(
             posts_nbr_before_creation + ONE_POST,
@@ -304,3 +307,96 @@ class PostFormCreateEditTests(TestCase):
             comments_nbr_before_creation,
             comments_nbr_after_creation
         )
+
+
+def make_jpeg(size, exif=None) -> bytes:
+    buffer = BytesIO()
+    image = Image.effect_noise(size, 64).convert('RGB')
+    image.save(buffer, 'JPEG', exif=exif or b'')
+    return buffer.getvalue()
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    MODERATION_ASYNC=True,
+    UPLOAD_IMAGE_MAX_DIMENSION=100,
+)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='HasNoName')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def upload(self, name: str, content: bytes):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            {
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(name, content),
+            },
+        )
+
+    def test_not_an_image_is_rejected(self):
+        """File without an image header is rejected with a form error."""
+        response = self.upload('photo.jpg', b'#!/bin/sh\necho pwned\n' * 10)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('WebP', response.context['form'].errors['image'][0])
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(UPLOAD_IMAGE_MAX_BYTES=1024)
+    def test_oversized_image_is_rejected(self):
+        """Image over UPLOAD_IMAGE_MAX_BYTES is rejected."""
+        response = self.upload('photo.jpg', make_jpeg((200, 200)))
+
+        self.assertIn('image', response.context['form'].errors)
+        self.assertFalse(Post.objects.exists())
+
+    def test_truncated_image_is_rejected(self):
+        """Image that fails to decode is a form error, not a crash."""
+        jpeg = make_jpeg((400, 300))
+        response = self.upload('photo.jpg', jpeg[:len(jpeg) // 2])
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(
+            'повреждено', response.context['form'].errors['image'][0]
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @mock.patch('posts.forms.normalize_image',
+                side_effect=Image.DecompressionBombError)
+    def test_decompression_bomb_is_rejected(self, _):
+        """Image too large to decode is a form error."""
+        response = self.upload('photo.jpg', make_jpeg((400, 300)))
+
+        self.assertIn('image', response.context['form'].errors)
+        self.assertFalse(Post.objects.exists())
+
+    def test_image_is_downscaled_without_exif(self):
+        """Large photo is stored rotated, downscaled and without EXIF."""
+        exif = Image.Exif()
+        # Orientation: rotate 90° clockwise to display
+        exif[0x0112] = 6
+        exif[0x010F] = 'Camera'
+        self.upload('photo.jpg', make_jpeg((400, 300), exif.tobytes()))
+
+        with Image.open(Post.objects.get().image.path) as image:
+            self.assertEqual(image.size, (75, 100))
+            self.assertNotIn('exif', image.info)
+
+    def test_small_image_is_kept(self):
+        """Image within the limits is stored byte for byte."""
+        self.upload('small.gif', TEST_GIF)
+
+        self.assertEqual(Post.objects.get().image.name, TEST_GIF_NAME)
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.models import Job
+from jobs.worker import work_off
+
+from ..models import CensoredWord, Group, Post
+
+User = get_user_model()
+CENSORED_WORD: str = 'редиска'
+
+
+@override_settings(MODERATION_ASYNC=True)
+class AsyncModerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+
+        cls.user = User.objects.create(username='HasNoName')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='some-slug',
+            description='Тестовое описание',
+        )
+        CensoredWord.objects.create(word=CENSORED_WORD)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def create_post(self, text: str) -> Post:
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': text, 'group': self.group.pk},
+        )
+        self.assertRedirects(
+            response, reverse('posts:profile', args=[self.user.username])
+        )
+        return Post.objects.get()
+
+    def test_post_create_queues_moderation(self):
+        """New post is saved as pending with a moderation job."""
+        post = self.create_post(f'Ты {CENSORED_WORD}')
+
+        self.assertEqual(post.status, Post.PENDING)
+        self.assertEqual(Job.objects.get().task, 'posts.moderate_post')
+
+    def test_pending_post_is_hidden(self):
+        """Pending post is only visible to its author."""
+        post = self.create_post('Тестовый пост')
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+        )
+
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.guest_client.get(page)
+                self.assertEqual(len(response.context['page_obj']), 0)
+
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+        response = self.authorized_client.get(
+            reverse('posts:profile', args=[self.user.username])
+        )
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertContains(response, 'На модерации')
+
+    def test_worker_publishes_clean_post(self):
+        """Worker publishes a post without censored words."""
+        post = self.create_post('Тестовый пост')
+
+        work_off()
+
+        post.refresh_from_db()
+        self.assertEqual(post.status, Post.PUBLISHED)
+
+    def test_worker_rejects_censored_post(self):
+        """Worker rejects a post with censored words."""
+        post = self.create_post(f'Ты {CENSORED_WORD}')
+
+        work_off()
+
+        post.refresh_from_db()
+        self.assertEqual(post.status, Post.REJECTED)
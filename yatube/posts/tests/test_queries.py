@@ -0,0 +1,188 @@
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import List
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Model
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..thumbnails import generate_thumbnails
+from .utils import TEST_GIF
+
+User = get_user_model()
+NUMBER_OF_POSTS: int = 25
+NUMBER_OF_COMMENTS: int = 5
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@contextmanager
+def deferred_loads():
+    """Collect "Model.field" of every column loaded after only()/defer()."""
+    loads: List[str] = []
+    refresh_from_db = Model.refresh_from_db
+
+    def recording(instance, using=None, fields=None):
+        loads.extend(
+            f'{type(instance).__name__}.{field}' for field in fields or ()
+        )
+        refresh_from_db(instance, using=using, fields=fields)
+
+    with mock.patch.object(Model, 'refresh_from_db', recording):
+        yield loads
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostQueryCountTests(TestCase):
+    """
+    Query counts of every posts URL on a seeded dataset.
+
+    A changed number means an N+1 or a lost select_related: fix the view
+    or template first, and only then update the expected number.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        list_of_posts: List[Post] = []
+
+        cls.guest_client = Client()
+
+        cls.user = User.objects.create(username='HasNoName')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+        cls.follower = User.objects.create(username='Follower')
+        cls.follower_client = Client()
+        cls.follower_client.force_login(cls.follower)
+
+        cls.other_author = User.objects.create(username='OtherAuthor')
+
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='some-slug',
+            description='Тестовое описание',
+        )
+
+        for i in range(NUMBER_OF_POSTS):
+            list_of_posts.append(
+                Post(
+                    text='Один из многих',
+                    author=(cls.user, cls.other_author)[i % 2],
+                    group=cls.group,
+                )
+            )
+
+        Post.objects.bulk_create(list_of_posts)
+
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user,
+            group=cls.group,
+            image=SimpleUploadedFile(
+                name="test_gif.gif", content=TEST_GIF, content_type="image/gif"
+            ),
+        )
+
+        # Thumbnail generation is a one-off, pin the steady state. The
+        # cache may still know the image from other tests, then sorl
+        # would not store it in this database.
+        cache.clear()
+        generate_thumbnails(cls.post.image)
+
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.follower, text='Комментарий')
+            for _ in range(NUMBER_OF_COMMENTS)
+        )
+
+        Follow.objects.create(user=cls.follower, author=cls.user)
+        Follow.objects.create(user=cls.follower, author=cls.other_author)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def assertQueryCounts(self, client, expected_counts):
+        for address, expected in expected_counts.items():
+            with self.subTest(address=address):
+                cache.clear()
+                with self.assertNumQueries(expected):
+                    client.get(address)
+
+    def test_guest_query_counts(self):
+        """Guest pages run a fixed number of queries."""
+        self.assertQueryCounts(self.guest_client, {
+            reverse('posts:index'): 3,
+            reverse('posts:group_list', args=[self.group.slug]): 4,
+            reverse('posts:profile', args=[self.user.username]): 4,
+            reverse('posts:post_detail', args=[self.post.pk]): 4,
+        })
+
+    def test_authorized_query_counts(self):
+        """Authorized pages run a fixed number of queries."""
+        self.assertQueryCounts(self.follower_client, {
+            reverse('posts:index'): 5,
+            reverse('posts:group_list', args=[self.group.slug]): 6,
+            reverse('posts:profile', args=[self.user.username]): 7,
+            reverse('posts:post_detail', args=[self.post.pk]): 6,
+            reverse('posts:add_comment', args=[self.post.pk]): 5,
+            reverse('posts:post_create'): 3,
+            reverse('posts:follow_index'): 5,
+        })
+
+        self.assertQueryCounts(self.authorized_client, {
+            reverse('posts:post_edit', args=[self.post.pk]): 5,
+        })
+
+    def test_follow_query_counts(self):
+        """Follow and unfollow run a fixed number of queries."""
+        self.assertQueryCounts(self.authorized_client, {
+            reverse('posts:profile_follow', args=[self.other_author]): 7,
+            reverse('posts:profile_unfollow', args=[self.other_author]): 4,
+        })
+
+    def test_feeds_load_no_deferred_fields(self):
+        """Feed cards only read the columns feed querysets select."""
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:follow_index'),
+            reverse('posts:api_batch')
+            + f'?format=cards&ids={self.post.pk},{self.post.pk - 1}',
+        )
+        for client in (self.follower_client, self.authorized_client):
+            for address in addresses:
+                with self.subTest(address=address):
+                    cache.clear()
+                    with deferred_loads() as loads:
+                        client.get(address)
+                    self.assertEqual(loads, [])
+
+    def test_feed_query_columns(self):
+        """Feeds do not select passwords, emails or group descriptions."""
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse('posts:index'))
+
+        feed_query = next(
+            query['sql'] for query in queries.captured_queries
+            if '"posts_post"."text"' in query['sql']
+        )
+        self.assertIn('"auth_user"."username"', feed_query)
+        for column in ('password', 'email', 'last_login', 'description'):
+            with self.subTest(column=column):
+                self.assertNotIn(f'."{column}"', feed_query)
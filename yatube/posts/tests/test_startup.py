@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+from typing import Dict
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# django.setup() plus URL resolution, cumulative import time
+IMPORT_TIME_TARGET_MS: int = 1000
+LAZY_MODULES = ('nltk', 'pymorphy2')
+STARTUP_CODE = (
+    'import django; django.setup(); '
+    'from django.urls import resolve; resolve("/")'
+)
+
+
+def measure_import_time() -> Dict[str, int]:
+    """Module -> cumulative import time in microseconds.
+
+    Names of nested imports keep their indentation.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'yatube.settings'},
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    modules: Dict[str, int] = {}
+
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        modules[name[1:].rstrip()] = int(cumulative)
+
+    return modules
+
+
+class StartupTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.modules = measure_import_time()
+
+    def test_nlp_is_not_imported_on_startup(self):
+        """NLP dependencies are loaded on first moderation only."""
+        for module in LAZY_MODULES:
+            with self.subTest(module=module):
+                self.assertNotIn(
+                    module, [name.strip() for name in self.modules]
+                )
+
+    def test_startup_import_time(self):
+        """Startup imports stay under the target."""
+        top_level = sum(
+            cumulative for name, cumulative in self.modules.items()
+            if not name.startswith(' ')
+        )
+        self.assertLess(top_level / 1000, IMPORT_TIME_TARGET_MS)
@@ -0,0 +1,443 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.models import KVStore
+
+from jobs.models import Job
+from jobs.worker import work_off
+
+from ..management.commands.pregenerate_thumbnails import prepare_image
+from ..models import Post
+from ..thumbnails import (FEED_SIZES, FEED_VARIANTS, FEED_WIDTH,
+                          FEED_WIDTHS, PLACEHOLDER_SIZE, describe_image,
+                          generate_thumbnails, prefetch_thumbnails,
+                          thumbnail_source)
+from .utils import TEST_GIF
+
+User = get_user_model()
+THUMBNAILS_KEY: str = 'sorl-thumbnail||thumbnails||'
+SOURCE_KEY: str = 'sorl-thumbnail||source||'
+FEW_POSTS: int = 2
+MANY_POSTS: int = 8
+PHOTOS: int = 3
+PHOTO_SIZE = (1600, 1200)
+# CSS pixels of a phone screen, at device pixel ratio 1
+PHONE_WIDTH: int = 360
+MIN_PHONE_SAVING: float = 0.5
+ORIENTATION: int = 0x0112
+ROTATE_90: int = 6
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPregenerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='HasNoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        # Same content means the same image name in every test.
+        cache.clear()
+
+    def create_post(self) -> Post:
+        return Post.objects.create(
+            text='Тестовый пост',
+            author=self.user,
+            image=SimpleUploadedFile(
+                name='small.gif', content=TEST_GIF, content_type='image/gif'
+            ),
+        )
+
+    def has_thumbnails(self) -> bool:
+        return KVStore.objects.filter(
+            key__startswith=THUMBNAILS_KEY
+        ).exists()
+
+    def test_save_queues_thumbnails(self):
+        """Saved post image gets its thumbnails from a worker."""
+        self.create_post()
+
+        self.assertEqual(Job.objects.get().task, 'posts.make_thumbnail')
+        self.assertFalse(self.has_thumbnails())
+
+        work_off()
+
+        self.assertTrue(self.has_thumbnails())
+
+    def test_edit_keeps_thumbnails(self):
+        """Saves that keep the image queue nothing, a new image does."""
+        post = self.create_post()
+        work_off()
+
+        post.text = 'Новый текст'
+        post.save()
+        loaded = Post.objects.get(pk=post.pk)
+        loaded.status = Post.REJECTED
+        loaded.save()
+        Post.objects.only('text').get(pk=post.pk).save()
+        self.assertFalse(Job.objects.filter(status=Job.QUEUED).exists())
+
+        loaded.image = SimpleUploadedFile('other.gif', TEST_GIF + b'\0')
+        loaded.save()
+        self.assertTrue(Job.objects.filter(status=Job.QUEUED).exists())
+
+    def test_post_without_image(self):
+        """Post without image queues nothing."""
+        Post.objects.create(text='Тестовый пост', author=self.user)
+
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(THUMBNAILS_EAGER=True)
+    def test_delete_releases_image(self):
+        """Last post with an image takes the file and thumbnails along."""
+        first = self.create_post()
+        second = self.create_post()
+        self.assertEqual(first.image.name, second.image.name)
+
+        first.delete()
+        self.assertTrue(default_storage.exists(second.image.name))
+
+        second.delete()
+        self.assertFalse(default_storage.exists(second.image.name))
+        self.assertFalse(self.has_thumbnails())
+
+    @override_settings(THUMBNAILS_EAGER=True)
+    def test_eager_thumbnails(self):
+        """With THUMBNAILS_EAGER thumbnails are made on save."""
+        self.create_post()
+
+        self.assertFalse(Job.objects.exists())
+        self.assertTrue(self.has_thumbnails())
+
+
+def make_photo(angle: int) -> bytes:
+    """Photo-like JPEG: smooth gradients plus sensor-like noise."""
+    channels = (
+        Image.linear_gradient('L').resize(PHOTO_SIZE),
+        Image.radial_gradient('L').resize(PHOTO_SIZE),
+        Image.effect_noise(PHOTO_SIZE, 60),
+    )
+    buffer = io.BytesIO()
+    Image.merge('RGB', channels).rotate(angle).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAILS_EAGER=True)
+class ThumbnailPrefetchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='HasNoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def create_posts(self, count: int) -> None:
+        for i in range(count):
+            Post.objects.create(
+                text='Тестовый пост',
+                author=self.user,
+                # Distinct content: equal files share one stored image.
+                image=SimpleUploadedFile(
+                    name=f'photo_{i}.jpg',
+                    content=make_photo(i),
+                    content_type='image/jpeg',
+                ),
+            )
+
+    def count_index_queries(self) -> int:
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('posts:index'))
+        return len(context)
+
+    def test_constant_lookups_per_page(self):
+        """Thumbnails of a page are looked up in one query."""
+        self.create_posts(FEW_POSTS)
+        few = self.count_index_queries()
+
+        self.create_posts(MANY_POSTS - FEW_POSTS)
+        many = self.count_index_queries()
+
+        images = Post.objects.values('image').distinct().count()
+        self.assertEqual(images, MANY_POSTS)
+        self.assertEqual(few, many)
+
+    def test_prefetched_url(self):
+        """Page shows the prefetched thumbnail of every post."""
+        self.create_posts(FEW_POSTS)
+        posts = list(Post.objects.all())
+
+        prefetch_thumbnails(posts)
+
+        response = self.client.get(reverse('posts:index'))
+        for post in posts:
+            with self.subTest(post=post.pk):
+                self.assertTrue(post.thumbnail)
+                self.assertContains(response, post.thumbnail.src)
+                self.assertContains(response, post.thumbnail.webp_srcset)
+
+    def test_missing_thumbnail(self):
+        """Post whose thumbnail is not generated yet gets None."""
+        with self.settings(THUMBNAILS_EAGER=False):
+            self.create_posts(1)
+        post = Post.objects.get()
+
+        prefetch_thumbnails([post])
+        self.assertIsNone(post.thumbnail)
+
+        generate_thumbnails(post.image)
+        prefetch_thumbnails([post])
+        self.assertTrue(post.thumbnail)
+
+    def test_missing_thumbnail_is_cached(self):
+        """Post without variants does not query again on the next page."""
+        with self.settings(THUMBNAILS_EAGER=False):
+            self.create_posts(1)
+        post = Post.objects.get()
+        prefetch_thumbnails([post])
+
+        with self.assertNumQueries(0):
+            prefetch_thumbnails([post])
+
+        self.assertIsNone(post.thumbnail)
+
+    def test_pregenerated_thumbnail_is_prefetched(self):
+        """pregenerate_thumbnails makes the variants the feed looks up."""
+        with self.settings(THUMBNAILS_EAGER=False):
+            self.create_posts(1)
+        post = Post.objects.get()
+
+        description, error = prepare_image(post.image.name, False)
+        prefetch_thumbnails([post])
+
+        self.assertEqual(error, '')
+        self.assertTrue(post.thumbnail)
+
+    def test_old_thumbnails_get_their_source(self):
+        """pregenerate_thumbnails maps existing thumbnails to the image."""
+        self.create_posts(1)
+        post = Post.objects.get()
+        generate_thumbnails(post.image)
+        KVStore.objects.filter(key__startswith=SOURCE_KEY).delete()
+        cache.clear()
+        geometry, options = FEED_VARIANTS[('JPEG', FEED_WIDTH)]
+        thumbnail = get_thumbnail(post.image, geometry, **options)
+        self.assertIsNone(thumbnail_source(thumbnail.name))
+
+        prepare_image(post.image.name, False)
+
+        self.assertEqual(thumbnail_source(thumbnail.name), post.image.name)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAILS_EAGER=True)
+class ResponsiveImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='HasNoName')
+        for i in range(PHOTOS):
+            Post.objects.create(
+                text='Тестовый пост',
+                author=cls.user,
+                image=SimpleUploadedFile(
+                    name=f'photo_{i}.jpg',
+                    content=make_photo(i * 30),
+                    content_type='image/jpeg',
+                ),
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def variant_bytes(self, image_format: str, width: int) -> int:
+        """Total size of one variant over all posts."""
+        total = 0
+        for post in Post.objects.all():
+            geometry, options = FEED_VARIANTS[(image_format, width)]
+            thumbnail = get_thumbnail(post.image, geometry, **options)
+            total += default_storage.size(thumbnail.name)
+        return total
+
+    def test_feed_markup(self):
+        """Feed images have srcset, sizes, dimensions and lazy loading."""
+        response = self.client.get(reverse('posts:index'))
+
+        self.assertContains(response, '<source type="image/webp"', PHOTOS)
+        self.assertContains(response, f'sizes="{FEED_SIZES}"', PHOTOS * 2)
+        self.assertContains(response, 'width="960" height="339"', PHOTOS)
+        self.assertContains(response, 'loading="lazy"', PHOTOS)
+
+    def test_post_detail_image_is_eager(self):
+        """Main image of the post page is not lazy."""
+        post = Post.objects.first()
+
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+
+        self.assertContains(response, 'loading="eager"')
+
+    def test_phone_bandwidth(self):
+        """Phone downloads much less than the single 960px JPEG crop."""
+        before = self.variant_bytes('JPEG', FEED_WIDTH)
+        # Browsers take the narrowest candidate covering the slot.
+        width = min(width for width in FEED_WIDTHS if width >= PHONE_WIDTH)
+        after = self.variant_bytes('WEBP', width)
+
+        self.assertLess(after, before * (1 - MIN_PHONE_SAVING))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PlaceholderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create(username='HasNoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def create_post(self) -> Post:
+        return Post.objects.create(
+            text='Тестовый пост',
+            author=self.user,
+            image=SimpleUploadedFile(
+                name='photo.jpg',
+                content=make_photo(0),
+                content_type='image/jpeg',
+            ),
+        )
+
+    def test_upload_is_described(self):
+        """Uploaded image gets its dimensions and a tiny placeholder."""
+        post = self.create_post()
+        post.refresh_from_db()
+
+        self.assertEqual(
+            (post.image_width, post.image_height), PHOTO_SIZE
+        )
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/webp;base64,')
+        )
+
+        placeholder = Image.open(io.BytesIO(
+            base64.b64decode(post.image_placeholder.split(',')[1])
+        ))
+        self.assertEqual(max(placeholder.size), PLACEHOLDER_SIZE)
+
+    def test_rotated_photo_dimensions(self):
+        """Dimensions are those of the photo as displayed."""
+        exif = Image.Exif()
+        exif[ORIENTATION] = ROTATE_90
+        buffer = io.BytesIO()
+        Image.new('RGB', PHOTO_SIZE).save(buffer, 'JPEG', exif=exif)
+
+        width, height, _ = describe_image(buffer)
+
+        self.assertEqual((height, width), PHOTO_SIZE)
+
+    def test_feed_renders_without_thumbnails(self):
+        """Card without generated thumbnails does not touch the engine."""
+        post = self.create_post()
+        KVStore.objects.all().delete()
+        feed_post = Post.objects.for_feed().get(pk=post.pk)
+
+        with self.assertNumQueries(0):
+            html = render_to_string(
+                'includes/picture.html', {'post': feed_post}
+            )
+
+        self.assertIn(f'src="{post.image.url}"', html)
+        self.assertIn(post.image_placeholder, html)
+        self.assertIn('width="{}" height="{}"'.format(*PHOTO_SIZE), html)
+        self.assertIn('loading="lazy"', html)
+        self.assertFalse(KVStore.objects.exists())
+
+    def test_undecodable_image_is_saved(self):
+        """Image that cannot be described is saved without a placeholder."""
+        post = Post.objects.create(
+            text='Тестовый пост',
+            author=self.user,
+            image=SimpleUploadedFile('broken.jpg', b'\xff\xd8\xff junk'),
+        )
+        post.refresh_from_db()
+
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_placeholder, '')
+
+    def test_placeholder_under_thumbnail(self):
+        """Generated thumbnails are shown over the placeholder."""
+        post = self.create_post()
+        generate_thumbnails(post.image)
+
+        response = self.client.get(reverse('posts:index'))
+
+        self.assertContains(response, '<source type="image/webp"')
+        self.assertContains(response, post.image_placeholder)
+
+    def test_legacy_image_is_described_in_bulk(self):
+        """pregenerate_thumbnails describes images stored before."""
+        post = self.create_post()
+        Post.objects.filter(pk=post.pk).update(
+            image_width=None, image_height=None, image_placeholder=''
+        )
+
+        (width, height, placeholder), error = prepare_image(
+            post.image.name, True
+        )
+
+        self.assertEqual(error, '')
+        self.assertEqual((width, height), PHOTO_SIZE)
+        self.assertEqual(placeholder, post.image_placeholder)
+
+    def test_broken_image_is_reported(self):
+        """pregenerate_thumbnails reports a broken image and goes on."""
+        name = default_storage.save('posts/broken.jpg', ContentFile(b'junk'))
+
+        description, error = prepare_image(name, True)
+
+        self.assertIsNone(description)
+        self.assertTrue(error)
@@ -0,0 +1,239 @@
+import base64
+from io import BytesIO
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from PIL import Image, ImageOps
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore
+
+FEED_WIDTH: int = 960
+FEED_HEIGHT: int = 339
+# Widths of the feed crop for srcset, the last one is the fallback src
+FEED_WIDTHS: Tuple[int, ...] = (320, 640, FEED_WIDTH)
+FEED_FORMATS: Tuple[str, ...] = ('WEBP', 'JPEG')
+# Bootstrap container: 960px on large screens, full width below
+FEED_SIZES: str = '(min-width: 992px) 960px, 100vw'
+# Long side of the inline placeholder; as WebP it is under 100 bytes
+PLACEHOLDER_SIZE: int = 16
+PLACEHOLDER_QUALITY: int = 30
+# EXIF orientations that swap width and height when applied
+ORIENTATION: int = 0x0112
+TRANSPOSED_ORIENTATIONS: Tuple[int, ...] = (5, 6, 7, 8)
+# Seconds a key without a value is cached; sorl overwrites the entry when
+# it generates the thumbnail, other processes wait for the timeout
+MISS_TIMEOUT: int = 60
+
+
+def feed_geometry(width: int) -> str:
+    return f'{width}x{round(width * FEED_HEIGHT / FEED_WIDTH)}'
+
+
+# (format, width) -> (geometry, options) of every feed variant. The JPEG
+# one of FEED_WIDTH is what {% thumbnail %} in includes/picture.html
+# makes for a post whose variants are not generated yet.
+FEED_VARIANTS: Dict[Tuple[str, int], Tuple[str, dict]] = {
+    (image_format, width): (
+        feed_geometry(width),
+        {'crop': 'center', 'upscale': True, 'format': image_format},
+    )
+    for image_format in FEED_FORMATS
+    for width in FEED_WIDTHS
+}
+THUMBNAILS: Tuple[Tuple[str, dict], ...] = tuple(FEED_VARIANTS.values())
+
+
+class Picture(NamedTuple):
+    """Feed variants of a post image, as used by includes/picture.html."""
+    src: str
+    width: int
+    height: int
+    srcset: str
+    webp_srcset: str
+    sizes: str = FEED_SIZES
+
+
+def describe_image(file) -> Tuple[int, int, str]:
+    """
+    Width, height and a placeholder data URI of an image file.
+
+    The placeholder is the whole image scaled down to PLACEHOLDER_SIZE,
+    cards stretch it under the lazily loaded picture.
+    """
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        if image.getexif().get(ORIENTATION) in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        # Let JPEGs decode at a fraction of their size.
+        image.draft('RGB', (PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+
+        buffer = BytesIO()
+        image.save(buffer, 'WEBP', quality=PLACEHOLDER_QUALITY)
+    file.seek(0)
+
+    data = base64.b64encode(buffer.getvalue()).decode()
+    return width, height, f'data:image/webp;base64,{data}'
+
+
+def generate_thumbnails(image) -> int:
+    """
+    Create every configured thumbnail of the image, return their count.
+
+    The image is an ImageField file or an ImageFile with its storage.
+    Existing thumbnails are found in the key-value store and skipped.
+    """
+    for geometry, options in THUMBNAILS:
+        get_thumbnail(image, geometry, **options)
+
+    return len(THUMBNAILS)
+
+
+def thumbnail_key(image, geometry: str, options: dict) -> str:
+    """
+    Key-value store key of the thumbnail, as sorl's get_thumbnail makes it.
+
+    Mirrors the option defaults of ThumbnailBackend.get_thumbnail, which
+    only computes the key on its way to a lookup.
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(options)
+
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return add_prefix(ImageFile(name, default.storage).key)
+
+
+def fetch_values(keys: Iterable[str]) -> Dict[str, str]:
+    """
+    Serialized values of the keys: one cache call, one query on misses.
+
+    Keys without a value are cached as misses too, with sorl's sentinel,
+    so posts lacking some variants do not query on every render.
+    """
+    keys = set(keys)
+    kvstore = default.kvstore
+
+    if not isinstance(kvstore, CachedDBStore):
+        values = {key: kvstore._get_raw(key) for key in keys}
+        return {key: value for key, value in values.items() if value}
+
+    cached = kvstore.cache.get_many(keys)
+    values = {
+        key: value for key, value in cached.items()
+        # sorl caches a sentinel class for known misses
+        if isinstance(value, str)
+    }
+    missing = keys - cached.keys()
+
+    if missing:
+        found = dict(
+            KVStore.objects.filter(key__in=missing).values_list(
+                'key', 'value'
+            )
+        )
+        kvstore.cache.set_many(found, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        kvstore.cache.set_many(
+            dict.fromkeys(missing - found.keys(), EMPTY_VALUE), MISS_TIMEOUT
+        )
+        values.update(found)
+
+    return values
+
+
+class SourceKVStore(CachedDBStore):
+    """
+    sorl's cached database store that also maps thumbnails to sources.
+
+    Thumbnail names only hash the source, so media access checks look
+    the source up by the thumbnail key.
+    """
+
+    def set(self, image_file, source=None):
+        super().set(image_file, source)
+        if source is not None:
+            self._set(image_file.key, source.name, identity='source')
+
+    def delete(self, image_file, delete_thumbnails=True):
+        super().delete(image_file, delete_thumbnails)
+        self._delete(image_file.key, identity='source')
+
+
+def record_sources(image: ImageFile) -> None:
+    """Map thumbnails made before SourceKVStore to the image."""
+    kvstore = default.kvstore
+    for key in kvstore._get(image.key, identity='thumbnails') or ():
+        if kvstore._get(key, identity='source') is None:
+            kvstore._set(key, image.name, identity='source')
+
+
+def thumbnail_source(name: str) -> Optional[str]:
+    """Name of the image a thumbnail was made from, None if unknown."""
+    key = ImageFile(name, default.storage).key
+    return default.kvstore._get(key, identity='source')
+
+
+def make_picture(files: Dict[Tuple[str, int], ImageFile]) -> Picture:
+    def srcset(image_format: str) -> str:
+        return ', '.join(
+            f'{files[(image_format, width)].url} '
+            f'{files[(image_format, width)].width}w'
+            for width in FEED_WIDTHS
+        )
+
+    fallback = files[('JPEG', FEED_WIDTH)]
+    return Picture(
+        src=fallback.url,
+        width=fallback.width,
+        height=fallback.height,
+        srcset=srcset('JPEG'),
+        webp_srcset=srcset('WEBP'),
+    )
+
+
+def prefetch_thumbnails(posts: Iterable) -> None:
+    """
+    Set post.thumbnail to a Picture of every post with an image.
+
+    All variants of the page are fetched in one lookup. A post misses
+    some until its thumbnail job has run; it gets None, and the
+    template falls back to {% thumbnail %}.
+    """
+    keys = {
+        post: {
+            variant: thumbnail_key(post.image, geometry, options)
+            for variant, (geometry, options) in FEED_VARIANTS.items()
+        }
+        for post in posts if post.image
+    }
+    if not keys:
+        return
+
+    values = fetch_values(
+        key for variants in keys.values() for key in variants.values()
+    )
+
+    for post, variants in keys.items():
+        picture: Optional[Picture] = None
+        if all(key in values for key in variants.values()):
+            picture = make_picture({
+                variant: deserialize_image_file(values[key])
+                for variant, key in variants.items()
+            })
+        post.thumbnail = picture
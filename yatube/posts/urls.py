@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 app_name = 'posts'
 
@@ -27,5 +27,18 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('export/<str:kind>/', views.export, name='export'),
+    path('api/posts/', api.posts, name='api_posts'),
+    path('api/posts/batch/', api.batch, name='api_batch'),
+    path('api/posts/<int:post_id>/', api.post, name='api_post'),
+    path(
+        'api/posts/<int:post_id>/comments/',
+        api.comments,
+        name='api_comments'
+    ),
+    path('api/groups/', api.groups, name='api_groups'),
+    path('api/groups/<slug:slug>/', api.group, name='api_group'),
+    path('api/profiles/<str:username>/', api.profile, name='api_profile'),
+    path('api/follow/', api.follow, name='api_follow'),
     path('', views.index, name='index'),
 ]
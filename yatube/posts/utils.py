@@ -1,13 +1,12 @@
 from difflib import SequenceMatcher
-from typing import List, Tuple
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple
 
-import nltk
-import pymorphy2
 from django.core.paginator import Paginator
-from nltk.stem.snowball import SnowballStemmer
-from nltk.tokenize import word_tokenize
 
-nltk.download('punkt')
+# nltk and pymorphy2 take a few hundred milliseconds and tens of megabytes
+# to load, so they are imported on first moderation, not with the URLconf.
 
 
 def get_paginator(request, posts, posts_per_page):
@@ -19,6 +18,16 @@ def get_paginator(request, posts, posts_per_page):
     return page_obj
 
 
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Split iterable into lists of the given size."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 def join_punctuation(seq: List[str], characters: str = '.,;?!') -> str:
     """Combine words and characters into string."""
     characters = set(characters)
@@ -35,9 +44,45 @@ def join_punctuation(seq: List[str], characters: str = '.,;?!') -> str:
     yield current
 
 
+@lru_cache(maxsize=None)
+def get_tokenizer():
+    """nltk word tokenizer, punkt data is downloaded if missing."""
+    import nltk
+    from nltk.tokenize import word_tokenize
+
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt')
+
+    return word_tokenize
+
+
+@lru_cache(maxsize=None)
+def get_morph_analyzer():
+    """Shared pymorphy2 analyzer, loading dictionaries is expensive."""
+    import pymorphy2
+
+    return pymorphy2.MorphAnalyzer()
+
+
+@lru_cache(maxsize=None)
+def get_stemmer():
+    from nltk.stem.snowball import SnowballStemmer
+
+    return SnowballStemmer("russian")
+
+
+def warm_up_moderation() -> None:
+    """Load moderation dependencies now instead of on first validation."""
+    get_tokenizer()
+    get_morph_analyzer()
+    get_stemmer()
+
+
 def lemmatize_words(tokenized_words: List[str]) -> List[str]:
     """Lemmatize words."""
-    morph = pymorphy2.MorphAnalyzer()
+    morph = get_morph_analyzer()
     result = [morph.parse(word)[0].normal_form for word in tokenized_words]
 
     return result
@@ -45,23 +90,29 @@ def lemmatize_words(tokenized_words: List[str]) -> List[str]:
 
 def stemmatize_words(tokenized_words: List[str]) -> List[str]:
     """Stemmatize words."""
-    snowball = SnowballStemmer("russian")
+    snowball = get_stemmer()
     result = [snowball.stem(word) for word in tokenized_words]
 
     return result
 
 
+@lru_cache(maxsize=8)
+def prepare_stop_words(stop_words: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Lemmatized and stemmed stop words, built once per word list."""
+    return tuple(stemmatize_words(lemmatize_words(list(stop_words))))
+
+
 def bad_language_validation(text: str, stop_words: List[str],
                             similarity_threshold: float) -> Tuple[str, bool]:
     """Check if text contains bad words and replace it with asterisks."""
     bad_words_idx: int = []
     validation_error: bool = False
-    tokenized_words: List[str] = word_tokenize(text)
+    tokenized_words: List[str] = get_tokenizer()(text)
 
     lemmatized_words: List[str] = lemmatize_words(tokenized_words)
-    lemmatized_stop_words: List[str] = lemmatize_words(stop_words)
-
-    stemmed_stop_words: List[str] = stemmatize_words(lemmatized_stop_words)
+    stemmed_stop_words: Tuple[str, ...] = prepare_stop_words(
+        tuple(stop_words)
+    )
     stemmed_words: List[str] = stemmatize_words(lemmatized_words)
 
     for i in range(len(stemmed_words)):
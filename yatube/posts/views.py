@@ -1,9 +1,16 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.cache import cache_page
 
+from .export import FORMATS, export_filename, stream_export
 from .forms import CommentForm, PostForm
 from .models import Comment, Follow, Group, Post, User
+from .signals import release_image
+from .tasks import moderate_post
+from .thumbnails import prefetch_thumbnails
 from .utils import get_paginator
 
 POSTS_LIMIT: int = 10
@@ -12,8 +19,9 @@ POSTS_LIMIT: int = 10
 @cache_page(20)
 def index(request):
     """Main page."""
-    posts = Post.objects.select_related('author', 'group').all()
+    posts = Post.objects.for_feed().published()
     page_obj = get_paginator(request, posts, POSTS_LIMIT)
+    prefetch_thumbnails(page_obj)
 
     context = {
         'page_obj': page_obj,
@@ -24,8 +32,9 @@ def index(request):
 def group_posts(request, slug):
     """Group posts page."""
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts_group.select_related('author').all()
+    posts = group.posts_group.for_feed('author').published()
     page_obj = get_paginator(request, posts, POSTS_LIMIT)
+    prefetch_thumbnails(page_obj)
 
     context = {
         'group': group,
@@ -37,8 +46,11 @@ def group_posts(request, slug):
 def profile(request, username):
     """Profile page."""
     user = get_object_or_404(User, username=username)
-    posts = user.posts.select_related('group').all()
+    posts = user.posts.for_feed('group')
+    if request.user != user:
+        posts = posts.published()
     page_obj = get_paginator(request, posts, POSTS_LIMIT)
+    prefetch_thumbnails(page_obj)
     following = False
 
     if (request.user != user
@@ -63,6 +75,9 @@ def post_detail(request, post_id):
         Post.objects.select_related('group', 'author'),
         pk=post_id
     )
+    if post.status != Post.PUBLISHED and post.author != request.user:
+        raise Http404
+    prefetch_thumbnails([post])
     form = CommentForm(request.POST or None)
     comments = Comment.objects.select_related('author').filter(post=post)
 
@@ -81,12 +96,18 @@ def post_create(request):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
+        moderate=not settings.MODERATION_ASYNC,
+        upload_errors=getattr(request, 'upload_errors', None),
     )
 
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
+        if settings.MODERATION_ASYNC:
+            post.status = Post.PENDING
         post.save()
+        if settings.MODERATION_ASYNC:
+            moderate_post.enqueue(post_id=post.pk)
 
         return redirect('posts:profile', post.author.username)
 
@@ -107,14 +128,27 @@ def post_edit(request, post_id):
     if post.author != request.user:
         return redirect('posts:post_detail', post_id)
 
+    old_image = post.image.name
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        moderate=not settings.MODERATION_ASYNC,
+        upload_errors=getattr(request, 'upload_errors', None),
     )
 
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        moderate = (
+            settings.MODERATION_ASYNC and 'text' in form.changed_data
+        )
+        if moderate:
+            post.status = Post.PENDING
+        post.save()
+        if moderate:
+            moderate_post.enqueue(post_id=post.pk)
+        if old_image and post.image.name != old_image:
+            release_image(post.image.storage, old_image)
         return redirect('posts:post_detail', post_id)
 
     context = {
@@ -131,6 +165,8 @@ def add_comment(request, post_id):
         Post.objects.select_related('group', 'author'),
         pk=post_id
     )
+    if post.status != Post.PUBLISHED:
+        raise Http404
     form = CommentForm(request.POST or None)
     comments = Comment.objects.select_related('author').filter(post=post)
 
@@ -154,11 +190,12 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     """Page with author's posts."""
-    posts = Post.objects.select_related(
-        'author'
-    ).filter(author__following__user=request.user)
+    posts = Post.objects.for_feed().published().filter(
+        author__following__user=request.user
+    )
 
     page_obj = get_paginator(request, posts, POSTS_LIMIT)
+    prefetch_thumbnails(page_obj)
 
     context = {
         'page_obj': page_obj,
@@ -186,3 +223,36 @@ def profile_unfollow(request, username):
     ).delete()
 
     return redirect("posts:profile", username=username)
+
+
+@staff_member_required
+def export(request, kind):
+    """
+    Stream posts, comments or follows as a JSONL or CSV download.
+
+    Query parameters: format, group, author, since, until and gzip=1.
+    """
+    output_format = request.GET.get('format', 'jsonl')
+    compress = request.GET.get('gzip') == '1'
+    try:
+        chunks = stream_export(
+            kind,
+            output_format,
+            compress=compress,
+            group=request.GET.get('group'),
+            author=request.GET.get('author'),
+            since=request.GET.get('since'),
+            until=request.GET.get('until'),
+        )
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    response = StreamingHttpResponse(
+        chunks,
+        content_type=(
+            'application/gzip' if compress else FORMATS[output_format]
+        ),
+    )
+    filename = export_filename(kind, output_format, compress)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
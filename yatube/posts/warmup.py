@@ -0,0 +1,139 @@
+import gc
+import logging
+import threading
+import time
+from typing import Dict
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.warmup import compile_templates, import_views, mark_warm
+
+from . import views
+from .models import CensoredWord, Group
+from .utils import prepare_stop_words, warm_up_moderation
+
+logger = logging.getLogger(__name__)
+
+
+def build_moderation_dictionary() -> int:
+    """Load NLP dependencies and prepare current stop words."""
+    warm_up_moderation()
+    stop_words = tuple(CensoredWord.objects.values_list('word', flat=True))
+    return len(prepare_stop_words(stop_words))
+
+
+def page_query(page: int) -> Dict[str, int]:
+    """Feed links point to the first page without ?page=1."""
+    return {'page': page} if page > 1 else {}
+
+
+def site_host() -> str:
+    """
+    Host the site is served under: the first ALLOWED_HOSTS entry.
+
+    Cached pages are keyed by the request host, so warm-up requests must
+    come with the one real requests use.
+    """
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            # '.example.com' also matches example.com itself
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def prerender_feeds(pages: int, groups: int) -> int:
+    """
+    Render first pages of index and of the biggest groups.
+
+    Fills the page and feed fragment caches, thumbnails and database
+    caches.
+    """
+    factory = RequestFactory(HTTP_HOST=site_host())
+    rendered = 0
+
+    for page in range(1, pages + 1):
+        request = factory.get(reverse('posts:index'), page_query(page))
+        request.user = AnonymousUser()
+        views.index(request)
+        rendered += 1
+
+    top_groups = Group.objects.annotate(
+        posts_count=Count('posts_group')
+    ).order_by('-posts_count').values_list('slug', flat=True)[:groups]
+
+    for slug in top_groups:
+        for page in range(1, pages + 1):
+            request = factory.get(
+                reverse('posts:group_list', args=[slug]), page_query(page)
+            )
+            request.user = AnonymousUser()
+            views.group_posts(request, slug)
+            rendered += 1
+
+    return rendered
+
+
+def warm_up(pages: int, groups: int) -> Dict[str, float]:
+    """
+    Run every warm-up step, return step -> seconds.
+
+    A failed step is logged and skipped: a worker that could not warm
+    its moderation still serves feeds.
+    """
+    steps = {
+        'views': import_views,
+        'templates': compile_templates,
+        'moderation': build_moderation_dictionary,
+        'feeds': lambda: prerender_feeds(pages, groups),
+    }
+    timings: Dict[str, float] = {}
+
+    for name, step in steps.items():
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception('Warm-up step %s failed', name)
+        timings[name] = time.perf_counter() - start
+
+    mark_warm()
+    return timings
+
+
+def preload(pages: int, groups: int) -> Dict[str, float]:
+    """
+    Warm up in the master process, before the server forks workers.
+
+    Workers then share the warmed pages copy-on-write. gc.freeze() keeps
+    the collector from touching the inherited objects, which would
+    otherwise copy their pages into every worker on the first collection.
+    Database connections must not be shared, so they are closed.
+    """
+    timings = warm_up(pages, groups)
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+    return timings
+
+
+def start_warm_up(pages: int, groups: int) -> threading.Thread:
+    """
+    Warm up in a background thread, so the worker answers at once.
+
+    /ready reports 503 until the thread is done. The thread closes its
+    own database connections when it finishes.
+    """
+    def run() -> None:
+        try:
+            warm_up(pages, groups)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=run, name='warm-up', daemon=True)
+    thread.start()
+    return thread
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+
+from .tasks import send_password_reset
 
 User = get_user_model()
 
@@ -9,3 +11,22 @@ class CreationForm(UserCreationForm):
         model = User
 
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Send the reset email from a worker, which also makes the link."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        send_password_reset.enqueue(
+            user_id=context['user'].pk,
+            to_email=to_email,
+            domain=context['domain'],
+            site_name=context['site_name'],
+            protocol=context['protocol'],
+            subject_template_name=subject_template_name,
+            email_template_name=email_template_name,
+            html_email_template_name=html_email_template_name,
+            from_email=from_email,
+        )
@@ -0,0 +1,54 @@
+from typing import Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from jobs.models import PRIORITY_HIGH
+from jobs.queue import task
+
+User = get_user_model()
+
+
+@task('users.send_password_reset', priority=PRIORITY_HIGH)
+def send_password_reset(user_id: int, to_email: str, domain: str,
+                        site_name: str, protocol: str,
+                        subject_template_name: str,
+                        email_template_name: str,
+                        html_email_template_name: Optional[str] = None,
+                        from_email: Optional[str] = None) -> None:
+    """
+    Render and send a password reset email.
+
+    The uid and token are made here: job kwargs are kept in the
+    database and shown in the admin, a reset link must not be.
+    """
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None or not user.has_usable_password():
+        return
+
+    context = {
+        'email': to_email,
+        'domain': domain,
+        'site_name': site_name,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'user': user,
+        'token': default_token_generator.make_token(user),
+        'protocol': protocol,
+    }
+    subject = loader.render_to_string(subject_template_name, context)
+    message = EmailMultiAlternatives(
+        ''.join(subject.splitlines()),
+        loader.render_to_string(email_template_name, context),
+        from_email,
+        [to_email],
+    )
+    if html_email_template_name is not None:
+        message.attach_alternative(
+            loader.render_to_string(html_email_template_name, context),
+            'text/html',
+        )
+    message.send()
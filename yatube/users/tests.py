@@ -1,11 +1,16 @@
+import re
 from http import HTTPStatus
 
 from django import forms
 from django.contrib.auth import get_user_model
+from django.core import mail
 from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from jobs.models import Job
+from jobs.worker import work_off
+
 User = get_user_model()
 ONE: int = 1
 
@@ -131,3 +136,77 @@ class UsersURLTests(TestCase):
         )
         self.assertTrue(User.objects.filter(username='Rick').exists())
         self.assertRedirects(response, reverse('posts:index'))
+
+
+class UsersQueryCountTests(TestCase):
+    """Query counts of every users URL."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+
+        cls.user = User.objects.create(username='HasNoName')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def assertQueryCounts(self, client, expected_counts):
+        for address, expected in expected_counts.items():
+            with self.subTest(address=address):
+                with self.assertNumQueries(expected):
+                    client.get(address)
+
+    def test_guest_query_counts(self):
+        """Guest user pages run a fixed number of queries."""
+        self.assertQueryCounts(self.guest_client, {
+            reverse('users:signup'): 0,
+            reverse('users:login'): 0,
+            reverse('users:password_reset'): 0,
+            reverse('users:password_reset_done'): 0,
+            reverse('users:password_reset_complete'): 0,
+            reverse(
+                'users:password_reset_confirm', args=['uid64', 'token']
+            ): 0,
+            reverse('users:logout'): 0,
+        })
+
+    def test_authorized_query_counts(self):
+        """Authorized user pages run a fixed number of queries."""
+        self.assertQueryCounts(self.authorized_client, {
+            reverse('users:password_change'): 2,
+            reverse('users:password_change_done'): 2,
+            reverse('users:logout'): 4,
+        })
+
+
+class PasswordResetTests(TestCase):
+    def test_password_reset_email_is_queued(self):
+        """Reset email is sent by a worker, not by the request."""
+        User.objects.create_user(
+            username='HasNoName',
+            email='user@example.com',
+            password='Secret-password-42',
+        )
+
+        response = self.client.post(
+            reverse('users:password_reset'), {'email': 'user@example.com'}
+        )
+
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(len(mail.outbox), 0)
+        job = Job.objects.get()
+        self.assertEqual(job.task, 'users.send_password_reset')
+        self.assertNotIn('token', job.kwargs)
+
+        work_off()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        link = re.search(r'/auth/reset/\S+/', mail.outbox[0].body).group()
+        self.assertNotIn(link, Job.objects.get().kwargs)
+        response = self.client.get(link, follow=True)
+        self.assertTrue(response.context['validlink'])
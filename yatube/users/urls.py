@@ -8,6 +8,7 @@ from django.contrib.auth.views import (LoginView, LogoutView,
 from django.urls import path
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -61,7 +62,9 @@ urlpatterns = [
 
     path(
         'password_reset/',
-        PasswordResetView.as_view
-        (template_name='users/password_reset_form.html'),
+        PasswordResetView.as_view(
+            template_name='users/password_reset_form.html',
+            form_class=QueuedPasswordResetForm,
+        ),
         name='password_reset'),
 ]
@@ -29,7 +29,6 @@ ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
     '[::1]',
-    'testserver',
 ]
 
 # Application definition
@@ -44,11 +43,17 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'jobs.apps.JobsConfig',
     'about.apps.AboutConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.TemplateProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,13 +61,14 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,9 +92,93 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    # Local replica: fill it with `python manage.py sync_replica`.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DATABASE_REPLICAS = ['replica']
+
+# Views whose reads may go to replicas
+REPLICA_READ_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+    'posts:export',
+    'posts:api_posts',
+    'posts:api_post',
+    'posts:api_batch',
+    'posts:api_comments',
+    'posts:api_groups',
+    'posts:api_group',
+    'posts:api_profile',
+    'posts:api_follow',
+    'media',
+)
+# Reads stay on primary for this long after any write by the client
+REPLICA_PIN_SECONDS = 10
+
+# Max queries per request; above it the request is logged,
+# or fails with DEBUG and QUERY_BUDGET_RAISE
+QUERY_BUDGET = 15
+QUERY_BUDGET_RAISE = False
+
+# Per-process histogram dumps, summed by the /metrics view
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+METRICS_FLUSH_SECONDS = 5
+
+# Time every template node; slow, for profiling sessions only
+TEMPLATE_PROFILING = False
+TEMPLATE_PROFILE_LOG = os.path.join(BASE_DIR, 'profiles', 'templates.jsonl')
+
+# cProfile this share of requests, plus requests with a signed X-Profile
+# header (see core.middleware.profile_header_value)
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles', 'requests')
+PROFILING_MAX_FILES = 500
+# X-Profile header values expire after this many seconds
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+
+# Load NLP moderation on startup instead of on first form validation
+MODERATION_WARM_UP = False
+# Save new and edited posts as pending and moderate them in a worker
+# instead of in the request
+MODERATION_ASYNC = False
+
+# Warm templates, moderation and feed caches when a worker starts;
+# /ready answers 503 until that is done
+WARM_UP_ON_START = not DEBUG
+WARM_UP_PAGES = 3
+WARM_UP_GROUPS = 5
+# Warm up and gc.freeze() once in the master process when wsgi.py is
+# imported before fork (gunicorn --preload, uwsgi without lazy-apps)
+WSGI_PRELOAD = False
+
+# Background jobs, see `manage.py worker`. A claimed job is invisible
+# to other workers for JOBS_VISIBILITY_TIMEOUT seconds; a failed one is
+# retried after JOBS_RETRY_DELAY seconds, doubled on every attempt.
+JOBS_MAX_ATTEMPTS = 3
+JOBS_VISIBILITY_TIMEOUT = 300
+JOBS_RETRY_DELAY = 10
+JOBS_POLL_SECONDS = 1
+
+# Generate post thumbnails on save in the request instead of in a job
+THUMBNAILS_EAGER = False
+# Records the source image of every thumbnail, for media access checks
+THUMBNAIL_KVSTORE = 'posts.thumbnails.SourceKVStore'
+
+# Queries slower than this are logged with EXPLAIN QUERY PLAN
+SLOW_QUERY_MS = 100
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -128,6 +218,27 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Media is served by core.views.media after MEDIA_ACCESS allows it.
+# Behind a front server set MEDIA_SENDFILE to 'X-Sendfile' (Apache,
+# lighttpd) or 'X-Accel-Redirect' (nginx, with an internal location
+# at MEDIA_ACCEL_REDIRECT_URL aliased to MEDIA_ROOT) to hand the file
+# over instead of streaming it through Python.
+MEDIA_ACCESS = 'posts.media.media_access'
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_URL = '/protected-media/'
+
+# Uploads are checked chunk by chunk before they are buffered: files
+# over UPLOAD_IMAGE_MAX_BYTES or without an image header are skipped.
+# Saved images lose their metadata and are downscaled to
+# UPLOAD_IMAGE_MAX_DIMENSION pixels on the long side.
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.ImageUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+UPLOAD_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+UPLOAD_IMAGE_MAX_DIMENSION = 2560
+UPLOAD_IMAGE_QUALITY = 90
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -1,7 +1,8 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import media, metrics, ready
 
 handler404 = "core.views.page_not_found"
 handler403 = 'core.views.permission_denied'
@@ -9,13 +10,15 @@ handler500 = "core.views.server_error"
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
+    path('ready', ready, name='ready'),
+    re_path(
+        rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$',
+        media,
+        name='media',
+    ),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
     path('', include('posts.urls', namespace='posts')),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
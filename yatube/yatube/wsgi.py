@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.WSGI_PRELOAD:
+    from posts.warmup import preload
+
+    preload(settings.WARM_UP_PAGES, settings.WARM_UP_GROUPS)
+elif settings.WARM_UP_ON_START:
+    from posts.warmup import start_warm_up
+
+    start_warm_up(settings.WARM_UP_PAGES, settings.WARM_UP_GROUPS)